@@ -0,0 +1,171 @@
+import asyncio
+import json
+import statistics
+import time
+import urllib.request
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from jobs import benchmark
+
+
+class Command(BaseCommand):
+    """
+    Load test of the chat WebSocket against a running ASGI server.
+
+    Seeds benchmark conversations, opens ``--connections`` WebSockets spread over
+    their participants and keeps them all open. Then posts ``--messages`` chat
+    messages through the HTTP API and measures how long each one takes to reach
+    every connection of the conversation's participants. The report shows how many
+    concurrent connections the server held and the delivery latency under that load.
+    Benchmark users and their data are deleted at the end.
+
+    Run it against a single worker to size one worker, and raise the open file limit
+    of both sides first (``ulimit -n``).
+
+    Usage:
+        python manage.py load_test_chat_socket --connections 5000 --messages 500 \\
+            --url http://localhost:8000
+    """
+    help = "Opens many chat WebSockets against a running server and measures message fan-out."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help="Base URL of the running server.")
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--conversations', type=int, default=200)
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--connect-concurrency', type=int, default=100,
+                            help="Handshakes in flight at the same time.")
+        parser.add_argument('--wait', type=float, default=5.0, help="Seconds to wait for the last deliveries.")
+
+    def handle(self, *args, **options):
+        try:
+            import websockets  # noqa: F401  (installed with uvicorn[standard])
+        except ImportError:
+            raise CommandError("The websockets package is required for this load test.")
+
+        try:
+            plan = self.seed(options)
+            asyncio.run(self.run(plan, options))
+        finally:
+            benchmark.cleanup()
+
+    def seed(self, options):
+        """
+        Returns the conversations as (id, [(user id, token)]) and the token of every user.
+        """
+        contractors = benchmark.get_contractors(max(options['conversations'] // 10, 1))
+        customers = benchmark.get_users('customer', options['conversations'])
+        benchmark.seed_jobs(len(contractors), contractors)
+        conversations = benchmark.seed_conversations(options['conversations'], customers, messages=0)
+        if not conversations:
+            raise CommandError("Could not seed conversations.")
+
+        users = [user.pk for user in contractors + customers]
+        existing = set(Token.objects.filter(user_id__in=users).values_list('user_id', flat=True))
+        Token.objects.bulk_create([Token(user_id=user, key=Token.generate_key()) for user in users
+                                   if user not in existing])
+        tokens = dict(Token.objects.filter(user_id__in=users).values_list('user_id', 'key'))
+
+        Participant = conversations[0].participants.through
+        members = defaultdict(list)
+        for conversation_id, user_id in Participant.objects.filter(
+            conversation_id__in=[conversation.pk for conversation in conversations]
+        ).values_list('conversation_id', 'user_id'):
+            members[conversation_id].append(user_id)
+        return {'conversations': sorted(members.items()), 'tokens': tokens}
+
+    async def run(self, plan, options):
+        import websockets
+
+        base = options['url'].rstrip('/')
+        socket_url = base.replace('http', 'ws', 1) + '/ws/chat/'
+        tokens = plan['tokens']
+        conversations = plan['conversations']
+
+        # Connections go round-robin over the participants of all conversations
+        participants = [user for _conversation, users in conversations for user in users]
+        connection_users = [participants[i % len(participants)] for i in range(options['connections'])]
+        connections_per_user = defaultdict(int)
+
+        deliveries = defaultdict(list)
+        failures = []
+        open_sockets = []
+        gate = asyncio.Semaphore(options['connect_concurrency'])
+
+        async def listen(socket):
+            try:
+                async for frame in socket:
+                    event = json.loads(frame)
+                    if event.get('type') == 'message.created':
+                        deliveries[event['message']['content']].append(time.perf_counter())
+            except websockets.ConnectionClosed:
+                pass
+
+        async def connect(user):
+            async with gate:
+                try:
+                    socket = await websockets.connect(f'{socket_url}?token={tokens[user]}', open_timeout=30)
+                except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                    failures.append(str(e))
+                    return
+            connections_per_user[user] += 1
+            open_sockets.append(socket)
+            listeners.append(asyncio.ensure_future(listen(socket)))
+
+        listeners = []
+        self.stdout.write(f"Opening {len(connection_users)} WebSockets to {socket_url} ...")
+        began = time.perf_counter()
+        await asyncio.gather(*(connect(user) for user in connection_users))
+        elapsed = time.perf_counter() - began
+        self.stdout.write(
+            f"  {len(open_sockets)} open, {len(failures)} failed, {len(open_sockets) / elapsed:8.1f} handshakes/s"
+        )
+        if failures:
+            self.stdout.write(f"  first failure: {failures[0]}")
+
+        def post(conversation_id, sender, content):
+            request = urllib.request.Request(
+                f'{base}/api/conversations/{conversation_id}/post_message/',
+                data=json.dumps({'content': content}).encode('utf-8'),
+                headers={'Content-Type': 'application/json', 'Authorization': f'Token {tokens[sender]}'},
+                method='POST',
+            )
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+
+        sent, expected = {}, 0
+        self.stdout.write(f"Posting {options['messages']} messages ...")
+        for i in range(options['messages']):
+            conversation_id, users = conversations[i % len(conversations)]
+            content = f'load-test {i}'
+            sent[content] = time.perf_counter()
+            await asyncio.to_thread(post, conversation_id, users[i % len(users)], content)
+            expected += sum(connections_per_user[user] for user in users)
+        await asyncio.sleep(options['wait'])
+
+        latencies = sorted(
+            (received - sent[content]) * 1000
+            for content, times in deliveries.items() if content in sent
+            for received in times
+        )
+        delivered = len(latencies)
+        self.stdout.write(f"  {delivered} of {expected} expected deliveries")
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(round(len(latencies) * 0.95)) - 1)]
+            self.stdout.write(
+                f"  latency median {statistics.median(latencies):8.1f} ms   p95 {p95:8.1f} ms   "
+                f"max {latencies[-1]:8.1f} ms"
+            )
+
+        await asyncio.gather(*(socket.close() for socket in open_sockets), return_exceptions=True)
+        for listener in listeners:
+            listener.cancel()
+
+        if failures or delivered < expected:
+            raise CommandError(
+                f"{len(failures)} connections failed, {expected - delivered} deliveries missing."
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(open_sockets)} concurrent connections held."))
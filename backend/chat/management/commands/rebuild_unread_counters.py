@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from chat import unread
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the unread counters of the chat (ReadState.unread_count and UnreadSummary)
+    from the read cursors, e.g. after bulk imports that bypass the signals.
+
+    Usage:
+        python manage.py rebuild_unread_counters
+        python manage.py rebuild_unread_counters --user 12 --user 15
+    """
+    help = "Recomputes the incrementally maintained unread counters of the chat."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only this user (id). Can be repeated.")
+
+    def handle(self, *args, **options):
+        count = unread.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Unread counters of {count} read states corrected."))
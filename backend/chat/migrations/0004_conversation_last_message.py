@@ -0,0 +1,65 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:40
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_last_message(apps, schema_editor):
+    """
+    Copies the latest message of every conversation into the new columns.
+    """
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+    latest = (
+        Message.objects.order_by('conversation_id', '-timestamp', '-id')
+        .distinct('conversation_id')
+        .values('conversation_id', 'sender_id', 'content', 'timestamp', 'offer_id', 'offer__price')
+    )
+    batch = []
+    for message in latest.iterator(chunk_size=2000):
+        if message['offer_id'] is not None:
+            preview = f"Angebot: {Decimal(message['offer__price']).quantize(Decimal('0.01'))} €"
+        else:
+            preview = (message['content'] or '')[:50]
+        batch.append(Conversation(
+            id=message['conversation_id'], last_message_at=message['timestamp'],
+            last_message_preview=preview, last_sender_id=message['sender_id'],
+        ))
+        if len(batch) >= 2000:
+            Conversation.objects.bulk_update(batch, ['last_message_at', 'last_message_preview', 'last_sender'])
+            batch = []
+    Conversation.objects.bulk_update(batch, ['last_message_at', 'last_message_preview', 'last_sender'])
+    # The inbox is ordered by updated_at, which now follows the latest message
+    Conversation.objects.filter(last_message_at__gt=models.F('updated_at')).update(
+        updated_at=models.F('last_message_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0003_alter_message_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+    ]
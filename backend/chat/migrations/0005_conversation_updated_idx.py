@@ -0,0 +1,20 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so the table stays writable
+    atomic = False
+
+    dependencies = [
+        ('chat', '0004_conversation_last_message'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=models.Index(fields=['-updated_at', '-id'], name='conversation_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.27 on 2026-10-17 19:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_states(apps, schema_editor):
+    """
+    Gives every participant a read cursor at the latest message of the conversation:
+    nothing was tracked before, so the existing history counts as read.
+    """
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+    ReadState = apps.get_model('chat', 'ReadState')
+    UnreadSummary = apps.get_model('chat', 'UnreadSummary')
+
+    latest = Message.objects.filter(conversation_id=models.OuterRef('conversation_id')).order_by('-id').values('id')[:1]
+    participants = Conversation.participants.through.objects.annotate(
+        latest=models.Subquery(latest)
+    ).values_list('conversation_id', 'user_id', 'latest')
+
+    users = set()
+    batch = []
+    for conversation_id, user_id, latest_id in participants.iterator(chunk_size=2000):
+        users.add(user_id)
+        batch.append(ReadState(conversation_id=conversation_id, user_id=user_id, last_read_message_id=latest_id or 0))
+        if len(batch) >= 2000:
+            ReadState.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ReadState.objects.bulk_create(batch, ignore_conflicts=True)
+    UnreadSummary.objects.bulk_create([UnreadSummary(user_id=user) for user in users], batch_size=2000,
+                                      ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0005_conversation_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='chat_unread', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_messages', models.PositiveIntegerField(default=0)),
+                ('unread_conversations', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.PositiveBigIntegerField(default=0)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='chat.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='read_state_conversation_user_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_read_states, migrations.RunPython.noop),
+    ]
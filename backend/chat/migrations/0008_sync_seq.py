@@ -0,0 +1,54 @@
+# Generated by Django 4.2.27 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_sync_states(apps, schema_editor):
+    """
+    Every chat participant gets a sync state; existing rows keep token 0.
+    """
+    SyncState = apps.get_model('chat', 'SyncState')
+    UnreadSummary = apps.get_model('chat', 'UnreadSummary')
+    users = UnreadSummary.objects.values_list('user_id', flat=True)
+    SyncState.objects.bulk_create([SyncState(user_id=user) for user in users.iterator(chunk_size=2000)],
+                                  batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0007_readstate_unreadsummary'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE SEQUENCE IF NOT EXISTS chat_sync_seq',
+            'DROP SEQUENCE IF EXISTS chat_sync_seq',
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='sync_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='sync_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='readstate',
+            name='sync_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='chat_sync', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('seq', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sync_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 20:11
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so the tables stay writable
+    atomic = False
+
+    dependencies = [
+        ('chat', '0008_sync_seq'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'sync_seq'], name='message_conv_sync_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='readstate',
+            index=models.Index(fields=['user', 'sync_seq'], name='read_state_user_sync_idx'),
+        ),
+    ]
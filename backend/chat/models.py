@@ -1,7 +1,14 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 
+from jobs import stats
 from jobs.models import Job
+from . import realtime, sync, unread
 
 
 class Conversation(models.Model):
@@ -14,8 +21,17 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Latest message, copied on every new message so the inbox never reads Message
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=100, null=True, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Inbox order (see ConversationViewSet.keyset_ordering)
+            models.Index(fields=['-updated_at', '-id'], name='conversation_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Conversation about '{self.job.title}'"
@@ -38,10 +54,29 @@ class Offer(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Sync token of the last change (see chat/sync.py)
+    sync_seq = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return f"Offer {self.id} - {self.price} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        """
+        Stamps the change for the delta sync, in the transaction that writes the offer.
+        """
+        with transaction.atomic():
+            self.sync_seq = sync.touch_conversation(self.conversation_id)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the stored status for the contractor's open-offer counter.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status', stats.UNKNOWN)
+        return instance
+
 
 class Message(models.Model):
     """
@@ -56,9 +91,179 @@ class Message(models.Model):
 
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # Sync token of the last change (see chat/sync.py)
+    sync_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
-        ordering = ['timestamp']
+        # id breaks ties between messages with the same timestamp
+        ordering = ['timestamp', 'id']
+        indexes = [
+            # Message history and delta sync page by id (see ConversationViewSet.messages)
+            models.Index(fields=['conversation', 'id'], name='message_conv_id_idx'),
+            # Inbox delta sync (see ConversationViewSet.changes)
+            models.Index(fields=['conversation', 'sync_seq'], name='message_conv_sync_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} at {self.timestamp}"
+
+    def save(self, *args, **kwargs):
+        """
+        Stamps the change for the delta sync. The signals that count the message run in
+        the same transaction.
+        """
+        with transaction.atomic():
+            self.sync_seq = sync.touch_conversation(self.conversation_id)
+            super().save(*args, **kwargs)
+
+    def preview(self):
+        """
+        Short text for the inbox: the offer price for offer messages, else the first 50 characters.
+        """
+        if self.offer_id is not None:
+            # Same text as for a price read back from the database
+            return f"Angebot: {Decimal(str(self.offer.price)).quantize(Decimal('0.01'))} €"
+        return (self.content or '')[:50]
+
+
+class ReadState(models.Model):
+    """
+    Read cursor of one participant in one conversation: the newest message they have
+    read and how many messages of the others came after it (see chat/unread.py).
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_states')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_read_states')
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Sync token of the last change of the conversation seen by this user (see chat/sync.py)
+    sync_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='read_state_conversation_user_uniq'),
+        ]
+        indexes = [
+            # Changed conversations of a user (see chat/sync.py)
+            models.Index(fields=['user', 'sync_seq'], name='read_state_user_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id}: {self.unread_count} unread"
+
+
+class UnreadSummary(models.Model):
+    """
+    Unread totals of a user over all conversations, for the header badge.
+    Kept in step with ReadState, so reading it is a primary key lookup.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='chat_unread')
+    unread_messages = models.PositiveIntegerField(default=0)
+    unread_conversations = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_messages} unread"
+
+
+class SyncState(models.Model):
+    """
+    Latest sync token of a user: the newest change of any of their conversations.
+    A client holding this token is up to date.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='chat_sync')
+    seq = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.seq}"
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def create_read_states(sender, instance, action, pk_set, reverse, **kwargs):
+    """
+    Gives new participants a read cursor (nothing read yet).
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # user.conversations.add(...): instance is the user
+        pairs = [(conversation_id, instance.pk) for conversation_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    unread.add_participants(pairs)
+
+
+@receiver(post_delete, sender=ReadState)
+def discount_deleted_read_state(sender, instance, **kwargs):
+    """
+    Keeps the unread summary right when a conversation or participant is deleted.
+    """
+    unread.read_state_deleted(instance)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_last_message(sender, instance, created, **kwargs):
+    """
+    Copies the new message into the conversation's last_message_* columns and bumps
+    updated_at, so the inbox order follows the latest activity.
+    """
+    if not created:
+        return
+    Conversation.objects.filter(pk=instance.conversation_id).filter(
+        models.Q(last_message_at__isnull=True) | models.Q(last_message_at__lte=instance.timestamp)
+    ).update(
+        last_message_at=instance.timestamp,
+        last_message_preview=instance.preview(),
+        last_sender=instance.sender_id,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Message)
+def count_unread_messages(sender, instance, created, **kwargs):
+    """
+    Counts the new message as unread for the other participants and as read for the sender.
+    """
+    if created:
+        unread.message_created(instance)
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    """
+    Pushes new messages (including offer messages) to the participants' WebSockets.
+    """
+    if created:
+        realtime.publish_message(instance)
+
+
+@receiver(post_save, sender=Offer)
+def push_offer_status(sender, instance, created, **kwargs):
+    """
+    Pushes offer status changes. Registered before count_open_offers_on_save,
+    which resets `_loaded_status`; new offers arrive with their message.
+    """
+    if not created and getattr(instance, '_loaded_status', None) != instance.status:
+        realtime.publish_offer_status(instance)
+
+
+@receiver(post_save, sender=Offer)
+def count_open_offers_on_save(sender, instance, created, **kwargs):
+    """
+    Keeps ContractorStats.open_offers of the offer's creator up to date.
+    """
+    old = None if created else getattr(instance, '_loaded_status', stats.UNKNOWN)
+    if old is stats.UNKNOWN:
+        stats.rebuild([instance.creator_id])
+    else:
+        was_open = old == Offer.Status.PENDING
+        stats.adjust_open_offers(instance.creator_id, int(instance.status == Offer.Status.PENDING) - int(was_open))
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Offer)
+def count_open_offers_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_status', stats.UNKNOWN)
+    if old is stats.UNKNOWN:
+        stats.rebuild([instance.creator_id])
+    elif old == Offer.Status.PENDING:
+        stats.adjust_open_offers(instance.creator_id, -1)
@@ -0,0 +1,160 @@
+"""
+Pub/sub for the chat WebSocket (see chat/websocket.py).
+
+Every connected user listens on the channel ``user:<id>``. New messages, offers and
+offer status changes are serialized once, when their transaction commits, and
+published to the channels of all conversation participants.
+
+The broker is pluggable: ``settings.CHAT_BROKER`` names a class with ``publish`` and
+``subscribe`` (see BaseBroker). The shipped InProcessBroker fans out within one
+process, which is enough for a single worker and for tests; several workers need a
+broker backed by a shared service (e.g. Redis pub/sub) implementing the same methods.
+"""
+import asyncio
+import functools
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from config.renderers import ORJSONRenderer
+
+# Put into a subscription whose client does not keep up; the socket is then closed
+OVERFLOW = object()
+
+
+class Subscription:
+    """
+    Messages of one channel for one connection. Created and read on the event loop
+    of the connection; ``deliver`` may be scheduled from any thread.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Dropping single events would leave the client silently out of date
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """
+    Interface of a chat broker.
+    """
+    # Undelivered messages per connection before it is closed as too slow
+    max_pending = 100
+
+    def publish(self, channel, message):
+        """
+        Sends ``message`` (text) to all subscribers of ``channel``. Callable from any thread.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """
+        Returns a Subscription for ``channel``. Must be called on the connection's event loop.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Broker for a single process: publishing hands the message to the event loop of
+    every subscribed connection.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+        return len(subscriptions)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_pending)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.channel]
+
+    def connection_count(self):
+        with self.lock:
+            return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'CHAT_BROKER', 'chat.realtime.InProcessBroker'))()
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish_event(conversation_id, event):
+    """
+    Publishes ``event`` to all participants of the conversation once the current
+    transaction commits (immediately outside of one).
+    """
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    def send():
+        message = ORJSONRenderer().render(event).decode('utf-8')
+        participants = Conversation.participants.through.objects.filter(
+            conversation_id=conversation_id
+        ).values_list('user_id', flat=True)
+        broker = get_broker()
+        for user_id in participants:
+            broker.publish(user_channel(user_id), message)
+
+    transaction.on_commit(send)
+
+
+def publish_message(message):
+    from .serializers import MessageSerializer
+
+    publish_event(message.conversation_id, {
+        'type': 'message.created',
+        'conversation': message.conversation_id,
+        'message': MessageSerializer(message).data,
+    })
+
+
+def publish_offer_status(offer):
+    from .serializers import OfferSerializer
+
+    publish_event(offer.conversation_id, {
+        'type': 'offer.updated',
+        'conversation': offer.conversation_id,
+        'offer': OfferSerializer(offer).data,
+    })
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from jobs.serializers import JobSerializer
+from jobs.serializers import JobSummarySerializer
 from .models import Conversation, Message, Offer
 
 
@@ -23,7 +23,7 @@ class OfferSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Offer
-        fields = ['id', 'price', 'description', 'status', 'creator']
+        fields = ['id', 'conversation', 'price', 'description', 'status', 'creator']
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -36,41 +36,33 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ['id', 'sender', 'sender_username', 'content', 'timestamp', 'offer']
+        fields = ['id', 'conversation', 'sender', 'sender_username', 'content', 'timestamp', 'offer']
 
 
 class ConversationListSerializer(serializers.ModelSerializer):
     """
     Serializer for listing conversations.
     Provides a preview of the last message and details about participants and the related job.
+    The preview is read from the conversation's last_message_* columns, not from its messages.
     """
     participants_details = ParticipantSerializer(source='participants', many=True, read_only=True)
-    job_details = JobSerializer(source='job', read_only=True)
-    last_message_preview = serializers.SerializerMethodField()
+    job_details = JobSummarySerializer(source='job', read_only=True)
+    # Annotated by ConversationViewSet.get_queryset
+    unread_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Conversation
-        fields = ['id', 'job_details', 'participants_details', 'last_message_preview', 'updated_at']
-
-    def get_last_message_preview(self, obj):
-        """
-        Returns a preview of the last message in the conversation.
-        If the last message is an offer, returns the price.
-        """
-        last_message = obj.messages.last()
-        if last_message:
-            if last_message.offer:
-                return f"Angebot: {last_message.offer.price} €"
-            return last_message.content[:50]
-        return None
+        fields = [
+            'id', 'job_details', 'participants_details', 'last_message_preview',
+            'last_message_at', 'last_sender', 'unread_count', 'updated_at',
+        ]
+        read_only_fields = ['last_message_preview', 'last_message_at', 'last_sender']
 
 
 class ConversationDetailSerializer(ConversationListSerializer):
     """
     Serializer for detailed conversation view.
-    Includes all messages in the conversation.
+    Messages are not embedded; clients page through them with the `messages` action.
     """
-    messages = MessageSerializer(many=True, read_only=True)
-
     class Meta(ConversationListSerializer.Meta):
-        fields = ConversationListSerializer.Meta.fields + ['messages']
+        pass
@@ -0,0 +1,87 @@
+"""
+Sync tokens for the inbox delta sync (``/api/conversations/changes/``).
+
+Every change a client has to see draws the next value from the database sequence
+``chat_sync_seq`` and stamps it on the changed rows:
+
+- a new or changed message or offer: the row itself, and the ReadState of every
+  participant of its conversation,
+- a conversation marked as read: the reader's ReadState.
+
+Every participant's SyncState holds the latest value stamped for them, which is the
+token the client sends back. The value is drawn only after the SyncState rows of all
+affected users are locked, so for each user the values become visible in increasing
+order: once a client has seen token ``n``, nothing with a lower value can still be
+committed. An unchanged client costs one primary key lookup of its SyncState.
+"""
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Subquery
+
+SEQUENCE = 'chat_sync_seq'
+
+
+def _next_value():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s)', [SEQUENCE])
+        return cursor.fetchone()[0]
+
+
+def lock(users):
+    """
+    Locks the SyncState rows of ``users`` (user ids or a subquery of them) in id order.
+    Writers lock these rows before any other chat row, so they cannot deadlock.
+    """
+    SyncState = apps.get_model('chat', 'SyncState')
+    list(SyncState.objects.select_for_update().filter(user_id__in=users).order_by('user_id')
+         .values_list('user_id', flat=True))
+
+
+def stamp(users):
+    """
+    Locks the SyncState rows of ``users``, draws the next value and stores it as their
+    token. Returns the value. Must run in a transaction.
+    """
+    SyncState = apps.get_model('chat', 'SyncState')
+    lock(users)
+    value = _next_value()
+    SyncState.objects.filter(user_id__in=users).update(seq=value)
+    return value
+
+
+def touch_conversation(conversation_id):
+    """
+    Stamps a change of the conversation for all its participants. Returns the value
+    to store on the changed message or offer.
+    """
+    ReadState = apps.get_model('chat', 'ReadState')
+    with transaction.atomic():
+        states = ReadState.objects.filter(conversation_id=conversation_id)
+        value = stamp(Subquery(states.values('user_id')))
+        states.update(sync_seq=value)
+    return value
+
+
+def current_token(user_id):
+    """
+    The user's latest token (0 before their first change).
+    """
+    SyncState = apps.get_model('chat', 'SyncState')
+    return SyncState.objects.filter(user_id=user_id).values_list('seq', flat=True).first() or 0
+
+
+def changes(user_id, since):
+    """
+    Ids of the user's conversations with changes after ``since``, and the querysets of
+    their messages and offers changed after it.
+    """
+    ReadState = apps.get_model('chat', 'ReadState')
+    Message = apps.get_model('chat', 'Message')
+    Offer = apps.get_model('chat', 'Offer')
+
+    conversation_ids = list(
+        ReadState.objects.filter(user_id=user_id, sync_seq__gt=since).values_list('conversation_id', flat=True)
+    )
+    messages = Message.objects.filter(conversation_id__in=conversation_ids, sync_seq__gt=since)
+    offers = Offer.objects.filter(conversation_id__in=conversation_ids, sync_seq__gt=since)
+    return conversation_ids, messages, offers
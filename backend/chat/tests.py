@@ -0,0 +1,157 @@
+"""Tests for the Chat application."""
+
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from jobs.models import Job
+from . import unread
+from .models import Conversation, Message, Offer, ReadState
+from .websocket import CLOSE_UNAUTHORIZED, PATH, chat_socket
+
+
+class MarkReadTests(APITestCase):
+    """
+    Read cursors and unread counters (chat/unread.py).
+    """
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='pw')
+        self.contractor = User.objects.create_user('contractor', password='pw')
+        job = Job.objects.create(title='Bad fliesen', description='Fliesen legen', contractor=self.contractor)
+        self.conversation = Conversation.objects.create(job=job)
+        self.conversation.participants.add(self.customer, self.contractor)
+        self.client.force_authenticate(self.customer)
+
+    def send(self, sender, content='Hallo'):
+        return Message.objects.create(conversation=self.conversation, sender=sender, content=content)
+
+    def mark_read(self, message_id=None):
+        data = {} if message_id is None else {'message_id': message_id}
+        return self.client.post(f'/api/conversations/{self.conversation.pk}/mark-read/', data, format='json')
+
+    def unread_messages(self):
+        return self.client.get('/api/conversations/unread-summary/').data['unread_messages']
+
+    def test_new_messages_count_as_unread_until_marked_read(self):
+        self.send(self.contractor)
+        latest = self.send(self.contractor)
+        self.assertEqual(self.unread_messages(), 2)
+
+        response = self.mark_read(latest.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], 0)
+        self.assertEqual(self.unread_messages(), 0)
+        self.assertFalse(Message.objects.filter(conversation=self.conversation, is_read=False).exists())
+
+    def test_message_id_outside_the_conversation_is_rejected(self):
+        self.send(self.contractor)
+
+        response = self.mark_read(10 ** 12)
+        self.assertEqual(response.status_code, 400)
+        state = ReadState.objects.get(conversation=self.conversation, user=self.customer)
+        self.assertEqual(state.unread_count, 1)
+
+        # The badge can still be cleared, explicitly and by replying
+        self.assertEqual(self.mark_read().data['unread_count'], 0)
+        self.send(self.contractor)
+        self.assertEqual(self.unread_messages(), 1)
+        self.send(self.customer, 'Danke')
+        self.assertEqual(self.unread_messages(), 0)
+
+    def test_cursor_is_never_moved_past_the_latest_message(self):
+        message = self.send(self.contractor)
+        state = unread.mark_read(self.conversation.pk, self.customer.pk, 10 ** 12)
+        self.assertEqual(state.last_read_message_id, message.pk)
+
+        self.send(self.contractor)
+        self.assertEqual(self.unread_messages(), 1)
+        self.assertEqual(self.mark_read().data['unread_count'], 0)
+
+
+
+class OfferCreateTests(APITestCase):
+    """
+    Creating an offer together with the message that carries it.
+    """
+
+    def setUp(self):
+        customer = User.objects.create_user('customer', password='pw')
+        self.contractor = User.objects.create_user('contractor', password='pw')
+        self.contractor.profile.is_craftsman = True
+        self.contractor.profile.save()
+        job = Job.objects.create(title='Bad fliesen', description='Fliesen legen', contractor=self.contractor)
+        self.conversation = Conversation.objects.create(job=job)
+        self.conversation.participants.add(customer, self.contractor)
+        self.client.force_authenticate(self.contractor)
+
+    def test_no_offer_is_left_without_its_message(self):
+        with mock.patch.object(Message.objects, 'create', side_effect=DatabaseError('insert failed')):
+            with self.assertRaises(DatabaseError):
+                self.client.post('/api/offers/', {'conversation_id': self.conversation.pk, 'price': '250.00',
+                                                  'description': 'Bad komplett'}, format='json')
+        self.assertFalse(Offer.objects.exists())
+
+class ChatSocketTests(TransactionTestCase):
+    """
+    The chat WebSocket (chat/websocket.py) on the in-process broker. A transaction
+    test case, since events are published when the writing transaction commits.
+    """
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='pw')
+        self.contractor = User.objects.create_user('contractor', password='pw')
+        job = Job.objects.create(title='Bad fliesen', description='Fliesen legen', contractor=self.contractor)
+        self.conversation = Conversation.objects.create(job=job)
+        self.conversation.participants.add(self.customer, self.contractor)
+        self.token = Token.objects.create(user=self.contractor).key
+
+    async def connect(self, token):
+        """
+        Runs the socket application; returns its task and the client's (incoming, outgoing) queues.
+        """
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'websocket', 'path': PATH, 'query_string': f'token={token}'.encode()}
+        await incoming.put({'type': 'websocket.connect'})
+        task = asyncio.ensure_future(chat_socket(scope, incoming.get, outgoing.put))
+        return task, incoming, outgoing
+
+    def post_message(self, content):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.post(f'/api/conversations/{self.conversation.pk}/post_message/', {'content': content},
+                           format='json')
+
+    def test_posted_message_is_delivered(self):
+        async def scenario():
+            task, incoming, outgoing = await self.connect(self.token)
+            self.assertEqual((await asyncio.wait_for(outgoing.get(), 5))['type'], 'websocket.accept')
+
+            response = await sync_to_async(self.post_message)('Wann passt es Ihnen?')
+            self.assertEqual(response.status_code, 201)
+
+            frame = await asyncio.wait_for(outgoing.get(), 5)
+            event = json.loads(frame['text'])
+            self.assertEqual(event['type'], 'message.created')
+            self.assertEqual(event['conversation'], self.conversation.pk)
+            self.assertEqual(event['message']['content'], 'Wann passt es Ihnen?')
+
+            await incoming.put({'type': 'websocket.disconnect'})
+            await asyncio.wait_for(task, 5)
+
+        async_to_sync(scenario)()
+
+    def test_invalid_token_is_rejected(self):
+        async def scenario():
+            task, _incoming, outgoing = await self.connect('invalid')
+            await asyncio.wait_for(task, 5)
+            self.assertEqual(await outgoing.get(), {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+
+        async_to_sync(scenario)()
@@ -0,0 +1,196 @@
+"""
+Unread counters of the chat, kept up to date on every new message.
+
+Every participant of a conversation has a ReadState: a cursor (the id of the newest
+message they have read) and the number of messages from the others after it. Every
+user has an UnreadSummary with the totals over all conversations, so the header badge
+is one primary key lookup.
+
+A new message increments the counters of the other participants and moves the
+sender's cursor past it (replying means having read the conversation). Marking a
+conversation as read up to a message flags the messages in one UPDATE and moves the
+cursor. ``rebuild`` recomputes counters from the cursors, e.g. after bulk inserts that
+bypass the signals.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from . import sync
+
+
+def _models():
+    return apps.get_model('chat', 'ReadState'), apps.get_model('chat', 'UnreadSummary')
+
+
+def add_participants(pairs, batch_size=2000):
+    """
+    Creates the read state, unread summary and sync state of every (conversation id,
+    user id) pair that has none yet.
+    """
+    ReadState, UnreadSummary = _models()
+    SyncState = apps.get_model('chat', 'SyncState')
+    pairs = list(pairs)
+    users = {user for _conversation, user in pairs}
+    ReadState.objects.bulk_create(
+        [ReadState(conversation_id=conversation, user_id=user) for conversation, user in pairs],
+        batch_size=batch_size, ignore_conflicts=True
+    )
+    UnreadSummary.objects.bulk_create(
+        [UnreadSummary(user_id=user) for user in users], batch_size=batch_size, ignore_conflicts=True
+    )
+    SyncState.objects.bulk_create(
+        [SyncState(user_id=user) for user in users], batch_size=batch_size, ignore_conflicts=True
+    )
+
+
+def _adjust_summary(user_id, messages, conversations):
+    _ReadState, UnreadSummary = _models()
+    if messages or conversations:
+        UnreadSummary.objects.filter(user_id=user_id).update(
+            unread_messages=Greatest(F('unread_messages') + messages, 0),
+            unread_conversations=Greatest(F('unread_conversations') + conversations, 0),
+        )
+
+
+def message_created(message):
+    """
+    Counts a new message as unread for the other participants and as read for its sender.
+    """
+    ReadState, UnreadSummary = _models()
+    with transaction.atomic():
+        # Locked in a fixed order, so concurrent messages and mark_read serialize per participant
+        states = dict(
+            ReadState.objects.select_for_update()
+            .filter(conversation_id=message.conversation_id)
+            .order_by('user_id')
+            .values_list('user_id', 'unread_count')
+        )
+        recipients = [user for user in states if user != message.sender_id]
+        if recipients:
+            ReadState.objects.filter(conversation_id=message.conversation_id, user_id__in=recipients).update(
+                unread_count=F('unread_count') + 1
+            )
+            first_unread = [user for user in recipients if not states[user]]
+            UnreadSummary.objects.filter(user_id__in=recipients).update(
+                unread_messages=F('unread_messages') + 1,
+                unread_conversations=F('unread_conversations') + Case(
+                    When(user_id__in=first_unread, then=Value(1)), default=Value(0), output_field=IntegerField()
+                ),
+            )
+
+        if states.get(message.sender_id):
+            mark_read(message.conversation_id, message.sender_id, message.pk)
+        elif message.sender_id in states:
+            ReadState.objects.filter(conversation_id=message.conversation_id, user_id=message.sender_id).update(
+                last_read_message_id=message.pk
+            )
+
+
+def mark_read(conversation_id, user_id, message_id=None):
+    """
+    Marks the messages of the others up to ``message_id`` (the latest if None) as read
+    for ``user_id``. The cursor never moves back, nor past the latest message.
+    Returns the user's ReadState.
+    """
+    ReadState, _UnreadSummary = _models()
+    Message = apps.get_model('chat', 'Message')
+    messages = Message.objects.filter(conversation_id=conversation_id)
+
+    with transaction.atomic():
+        # Sync rows are locked first, like every chat write does
+        sync.lock([user_id])
+        state = ReadState.objects.select_for_update().filter(conversation_id=conversation_id, user_id=user_id).first()
+        if state is None:
+            add_participants([(conversation_id, user_id)])
+            state = ReadState.objects.select_for_update().get(conversation_id=conversation_id, user_id=user_id)
+
+        # Never past the latest message, or later messages could not be marked read
+        latest = messages.order_by('-id').values_list('id', flat=True).first() or 0
+        message_id = latest if message_id is None else min(message_id, latest)
+        if message_id <= state.last_read_message_id:
+            return state
+
+        others = messages.exclude(sender_id=user_id)
+        others.filter(id__gt=state.last_read_message_id, id__lte=message_id, is_read=False).update(is_read=True)
+        remaining = others.filter(id__gt=message_id).count()
+
+        _adjust_summary(user_id, remaining - state.unread_count, bool(remaining) - bool(state.unread_count))
+        state.last_read_message_id = message_id
+        state.unread_count = remaining
+        state.sync_seq = sync.stamp([user_id])
+        state.save(update_fields=['last_read_message_id', 'unread_count', 'sync_seq'])
+    return state
+
+
+def totals(user_id):
+    """
+    The user's unread messages and conversations (primary key lookup).
+    """
+    _ReadState, UnreadSummary = _models()
+    row = UnreadSummary.objects.filter(user_id=user_id).values('unread_messages', 'unread_conversations').first()
+    return row or {'unread_messages': 0, 'unread_conversations': 0}
+
+
+def read_state_deleted(state):
+    """
+    Removes the counts of a deleted read state (conversation or participant deleted) from the summary.
+    """
+    if state.unread_count:
+        _adjust_summary(state.user_id, -state.unread_count, -1)
+
+
+def rebuild(user_ids=None):
+    """
+    Recomputes the unread counters of the given users (all if None) from their read
+    cursors, creating missing read states with nothing read. Returns the number of read
+    states whose count was wrong.
+    """
+    ReadState, UnreadSummary = _models()
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+
+    participants = Conversation.participants.through.objects.all()
+    states = ReadState.objects.all()
+    if user_ids is not None:
+        participants = participants.filter(user_id__in=user_ids)
+        states = states.filter(user_id__in=user_ids)
+    add_participants(participants.values_list('conversation_id', 'user_id').iterator(chunk_size=2000))
+
+    unread = (
+        Message.objects.filter(conversation_id=OuterRef('conversation_id'), id__gt=OuterRef('last_read_message_id'))
+        .filter(~Q(sender_id=OuterRef('user_id')))
+        .order_by()
+        .values('conversation_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    expected = Coalesce(Subquery(unread), 0)
+
+    with transaction.atomic():
+        corrected = states.exclude(unread_count=expected).update(unread_count=expected)
+        totals = {
+            row.pop('user_id'): row
+            for row in states.values('user_id').annotate(
+                unread_messages=Sum('unread_count'),
+                unread_conversations=Count('id', filter=Q(unread_count__gt=0)),
+            ).order_by()
+        }
+        summaries = UnreadSummary.objects.all()
+        if user_ids is not None:
+            summaries = summaries.filter(user_id__in=user_ids)
+        users = set(totals) | set(summaries.values_list('user_id', flat=True))
+        UnreadSummary.objects.bulk_create(
+            [
+                UnreadSummary(
+                    user_id=user,
+                    unread_messages=totals.get(user, {}).get('unread_messages') or 0,
+                    unread_conversations=totals.get(user, {}).get('unread_conversations') or 0,
+                )
+                for user in users
+            ],
+            batch_size=2000, update_conflicts=True, unique_fields=['user'],
+            update_fields=['unread_messages', 'unread_conversations', 'updated_at'],
+        )
+    return corrected
@@ -1,12 +1,24 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
 from config.ai_utils import get_ai_response
+from config.pagination import OptInKeysetPagination
+from jobs import stats
+from jobs.availability import CalendarError, parse_day
+from jobs.exceptions import booking_conflicts
+from jobs.idempotency import idempotent
 from jobs.models import Booking, Job
 
-from .models import Conversation, Message, Offer
+from . import realtime, sync, unread
+from .fast_serializers import ConversationListValuesSerializer
+from .models import Conversation, Message, Offer, ReadState
 from .serializers import (
     ConversationDetailSerializer,
     ConversationListSerializer,
@@ -22,15 +34,27 @@ class ConversationViewSet(viewsets.ModelViewSet):
     as well as posting messages and generating AI suggestions.
     """
     permission_classes = [permissions.IsAuthenticated]
+    # Page numbers by default, keyset pagination with `?cursor=`
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-updated_at', '-id')
+    messages_page_size = 50
+    messages_max_page_size = 200
+    # Above this many changed messages the client reloads instead of syncing
+    changes_max_messages = 500
 
     def get_queryset(self):
         """
         Returns the list of conversations for the authenticated user.
-        Includes related messages and participant profiles to optimize database queries.
+        Includes participant profiles and the user's unread count; messages are loaded
+        by the `messages` action.
         """
-        return self.request.user.conversations.prefetch_related(
-            'messages', 'participants__profile'
-        ).all()
+        participants = User.objects.select_related('profile').order_by('id')
+        unread_count = ReadState.objects.filter(
+            conversation_id=OuterRef('pk'), user_id=self.request.user.pk
+        ).values('unread_count')
+        return self.request.user.conversations.select_related('job__contractor').prefetch_related(
+            Prefetch('participants', queryset=participants)
+        ).annotate(unread_count=Coalesce(Subquery(unread_count), 0))
 
     def get_serializer_class(self):
         """
@@ -42,6 +66,19 @@ class ConversationViewSet(viewsets.ModelViewSet):
             return ConversationDetailSerializer
         return ConversationListSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Lists the conversations, rendered from `.values()` rows by ConversationListValuesSerializer.
+        """
+        serializer = ConversationListValuesSerializer(context=self.get_serializer_context())
+        sort_keys = [field.lstrip('-') for field in self.keyset_ordering]
+        rows = serializer.values(self.filter_queryset(self.get_queryset()), *sort_keys)
+
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serializer.many(rows))
+        return self.get_paginated_response(serializer.many(page))
+
     def create(self, request, *args, **kwargs):
         """
         Creates a new conversation for a specific job.
@@ -79,11 +116,133 @@ class ConversationViewSet(viewsets.ModelViewSet):
             sender=request.user,
             content=initial_message
         )
+        # Written by the Message signal
+        conversation.refresh_from_db(fields=['last_message_at', 'last_message_preview', 'last_sender', 'updated_at'])
 
         serializer = ConversationDetailSerializer(conversation)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """
+        Pages through the messages of a conversation by id, on the (conversation, id) index.
+
+        - `?after=<id>`: the messages after that one, oldest first (delta sync).
+        - `?before=<id>`: the `limit` messages before that one (older history).
+        - neither: the newest `limit` messages.
+
+        Results are always in chronological order; `has_more` tells whether another
+        page exists in the requested direction.
+        """
+        if not request.user.conversations.filter(pk=pk).exists():
+            return Response({'detail': 'Conversation not found.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            after = int(request.query_params['after']) if 'after' in request.query_params else None
+            before = int(request.query_params['before']) if 'before' in request.query_params else None
+            limit = min(max(int(request.query_params.get('limit', self.messages_page_size)), 1),
+                        self.messages_max_page_size)
+        except ValueError:
+            return Response(
+                {'detail': 'after, before and limit must be numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        messages = Message.objects.filter(conversation_id=pk).select_related('sender', 'offer')
+        if after is not None:
+            page = list(messages.filter(id__gt=after).order_by('id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+        else:
+            if before is not None:
+                messages = messages.filter(id__lt=before)
+            page = list(messages.order_by('-id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
+
+        return Response({
+            'results': MessageSerializer(page, many=True).data,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync of the inbox: what changed after the sync token `?since=`.
+
+        Returns the new `token` (the next `since`), the changed conversations as in the
+        list, and their messages and offers changed after `since`. An up-to-date client
+        gets 304 after one primary key lookup.
+
+        Without `since`, only the current token is returned; fetch it before loading the
+        list. `reset` is true when the client has to reload the list instead: more than
+        `changes_max_messages` changed messages, or a token this server never issued.
+        """
+        token = sync.current_token(request.user.pk)
+        empty = {'token': token, 'reset': False, 'conversations': [], 'messages': [], 'offers': []}
+        if 'since' not in request.query_params:
+            return Response(empty)
+        try:
+            since = int(request.query_params['since'])
+        except ValueError:
+            return Response({'detail': 'since must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if since == token:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        if since > token:
+            return Response({**empty, 'reset': True})
+
+        conversation_ids, messages, offers = sync.changes(request.user.pk, since)
+        messages = list(messages.select_related('sender', 'offer').order_by('id')[:self.changes_max_messages + 1])
+        if len(messages) > self.changes_max_messages:
+            return Response({**empty, 'reset': True})
+
+        serializer = ConversationListValuesSerializer(context=self.get_serializer_context())
+        conversations = self.get_queryset().filter(id__in=conversation_ids).order_by(*self.keyset_ordering)
+        return Response({
+            'token': token,
+            'reset': False,
+            'conversations': serializer.many(serializer.values(conversations)),
+            'messages': MessageSerializer(messages, many=True).data,
+            'offers': OfferSerializer(offers.order_by('id'), many=True).data,
+        })
+
+    @action(detail=True, methods=['post'], url_path='mark-read')
+    def mark_read(self, request, pk=None):
+        """
+        Marks the conversation as read up to `message_id` (the latest message if omitted).
+        Returns the new read cursor and the user's unread totals.
+        """
+        if not request.user.conversations.filter(pk=pk).exists():
+            return Response({'detail': 'Conversation not found.'}, status=status.HTTP_404_NOT_FOUND)
+        message_id = request.data.get('message_id')
+        if message_id is not None:
+            try:
+                message_id = int(message_id)
+            except (TypeError, ValueError):
+                return Response({'detail': 'message_id must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+            # A cursor past the conversation's messages could never be cleared again
+            if not Message.objects.filter(conversation_id=pk, id=message_id).exists():
+                return Response(
+                    {'detail': 'message_id is not a message of this conversation.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        state = unread.mark_read(int(pk), request.user.pk, message_id)
+        return Response({
+            'conversation': state.conversation_id,
+            'last_read_message_id': state.last_read_message_id,
+            'unread_count': state.unread_count,
+            **unread.totals(request.user.pk),
+        })
+
+    @action(detail=False, methods=['get'], url_path='unread-summary')
+    def unread_summary(self, request):
+        """
+        The user's unread messages and conversations, read from one UnreadSummary row.
+        """
+        return Response(unread.totals(request.user.pk))
+
     @action(detail=True, methods=['post'])
+    @idempotent
     def post_message(self, request, pk=None):
         """
         Adds a new message to the conversation.
@@ -136,6 +295,7 @@ class OfferViewSet(viewsets.ViewSet):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def create(self, request):
         """
         Creates a new offer within a conversation.
@@ -159,24 +319,28 @@ class OfferViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        offer = Offer.objects.create(
-            conversation=conversation,
-            creator=user,
-            price=price,
-            description=description
-        )
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=user,
-            offer=offer
-        )
+        # Both or neither, so a retry never leaves an offer without its message behind
+        with transaction.atomic():
+            offer = Offer.objects.create(
+                conversation=conversation,
+                creator=user,
+                price=price,
+                description=description
+            )
+            message = Message.objects.create(
+                conversation=conversation,
+                sender=user,
+                offer=offer
+            )
         serializer = MessageSerializer(message)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def accept(self, request, pk=None):
         """
-        Accepts an offer and creates a corresponding booking.
+        Accepts an offer and creates a corresponding booking, atomically.
+        Accepts an optional `scheduled_date`; a day that is already taken answers 409.
         """
         user = request.user
         try:
@@ -192,17 +356,44 @@ class OfferViewSet(viewsets.ViewSet):
         if user not in offer.conversation.participants.all():
             raise PermissionDenied("You are not a participant in this conversation.")
 
-        offer.status = Offer.Status.ACCEPTED
-        offer.save()
+        # Optional day of the booking, checked against the contractor's calendar
+        scheduled_date = None
+        if request.data.get('scheduled_date'):
+            try:
+                scheduled_date = parse_day(str(request.data['scheduled_date']), 'scheduled_date')
+            except CalendarError as e:
+                return Response({'scheduled_date': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+            if scheduled_date < timezone.now().date():
+                return Response(
+                    {'scheduled_date': ['Das Datum darf nicht in der Vergangenheit liegen.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
         service = offer.conversation.job
-        Booking.objects.create(
-            service=service,
-            customer=user,
-            contractor=service.contractor,
-            price=offer.price,
-            status=Booking.Status.CONFIRMED
-        )
+        with booking_conflicts():
+            # Stamped before the offer row is locked, in the order every chat write uses
+            sync_seq = sync.touch_conversation(offer.conversation_id)
+            # Only a PENDING offer can be accepted, and only once, even under concurrent requests
+            accepted = Offer.objects.filter(pk=offer.pk, status=Offer.Status.PENDING).update(
+                status=Offer.Status.ACCEPTED, sync_seq=sync_seq
+            )
+            if not accepted:
+                return Response(
+                    {'detail': 'Dieses Angebot wurde bereits bearbeitet.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            # The conditional update bypasses the Offer signals
+            stats.adjust_open_offers(offer.creator_id, -1)
+            offer.status = Offer.Status.ACCEPTED
+            realtime.publish_offer_status(offer)
+            Booking.objects.create(
+                service=service,
+                customer=user,
+                contractor=service.contractor,
+                price=offer.price,
+                scheduled_date=scheduled_date,
+                status=Booking.Status.CONFIRMED
+            )
 
         return Response(OfferSerializer(offer).data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,92 @@
+"""
+Chat WebSocket, as a plain ASGI application mounted in config/asgi.py.
+
+Clients connect to ``/ws/chat/?token=<auth token>`` (browsers cannot set headers on
+WebSocket requests) and receive every chat event of their conversations as one JSON
+text frame each (see chat/realtime.py):
+
+    {"type": "message.created", "conversation": 3, "message": {...}}
+    {"type": "offer.updated", "conversation": 3, "offer": {...}}
+
+A text frame ``ping`` is answered with ``pong``. An idle connection costs one
+subscription queue and two pending futures on the event loop, no thread.
+
+Close codes: 4401 missing or invalid token, 4008 client too slow to keep up (it should
+reconnect and reload the conversation).
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from . import realtime
+
+PATH = '/ws/chat/'
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_TOO_SLOW = 4008
+
+
+@sync_to_async
+def authenticate(scope):
+    """
+    Returns the id of the active user owning the ``token`` query parameter, or None.
+    """
+    token = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token', [''])[0]
+    if not token:
+        return None
+    close_old_connections()
+    try:
+        return Token.objects.filter(key=token, user__is_active=True).values_list('user_id', flat=True).first()
+    finally:
+        close_old_connections()
+
+
+async def chat_socket(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    user_id = await authenticate(scope)
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    subscription = realtime.get_broker().subscribe(realtime.user_channel(user_id))
+    await send({'type': 'websocket.accept'})
+
+    incoming = asyncio.ensure_future(receive())
+    outgoing = asyncio.ensure_future(subscription.get())
+    try:
+        while True:
+            done, _pending = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+
+            if incoming in done:
+                event = incoming.result()
+                if event['type'] == 'websocket.disconnect':
+                    break
+                if event.get('text') == 'ping':
+                    await send({'type': 'websocket.send', 'text': 'pong'})
+                incoming = asyncio.ensure_future(receive())
+
+            if outgoing in done:
+                message = outgoing.result()
+                if message is realtime.OVERFLOW:
+                    await send({'type': 'websocket.close', 'code': CLOSE_TOO_SLOW})
+                    break
+                await send({'type': 'websocket.send', 'text': message})
+                outgoing = asyncio.ensure_future(subscription.get())
+    finally:
+        subscription.close()
+        for future in (incoming, outgoing):
+            future.cancel()
+
+
+async def reject_socket(scope, receive, send):
+    """
+    Closes WebSocket connections to unknown paths.
+    """
+    event = await receive()
+    if event['type'] == 'websocket.connect':
+        await send({'type': 'websocket.close'})
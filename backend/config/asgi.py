@@ -2,6 +2,9 @@
 ASGI config for the MyCraft project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections to ``/ws/chat/`` go to the chat
+socket (see chat/websocket.py). Serve it with an ASGI server, e.g.
+``gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker``.
 
 For more information on this file, see:
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +12,23 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+if settings.DEBUG:
+    # What runserver does for static files
+    django_application = ASGIStaticFilesHandler(django_application)
+
+# Imported after Django is set up, since it uses models
+from chat.websocket import PATH as CHAT_SOCKET_PATH, chat_socket, reject_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        socket = chat_socket if scope['path'] == CHAT_SOCKET_PATH else reject_socket
+        return await socket(scope, receive, send)
+    return await django_application(scope, receive, send)
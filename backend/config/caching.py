@@ -0,0 +1,18 @@
+"""
+Helpers for caches that are written by one process and invalidated by another.
+
+Map tiles and services responses are dropped when a job changes, which also happens
+in the ``geocode_jobs`` worker. With a process-local cache (LocMemCache) that
+invalidation never reaches the web process, so these caches switch themselves off
+instead of serving stale data; configure a shared backend (DJANGO_CACHE_BACKEND,
+e.g. Redis) to use them.
+"""
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Whether entries of the cache ``alias`` are seen (and deleted) by every process.
+    """
+    return not isinstance(caches[alias], LocMemCache)
@@ -0,0 +1,107 @@
+"""
+Read-only "values" serializers for hot list endpoints.
+
+A ValuesSerializer describes its output once, as (name, ``.values()`` path, formatter)
+triples, and turns plain ``.values()`` rows into the exact representation the matching
+DRF ModelSerializer would produce. No model instances, no field binding and no
+per-object serializer machinery are involved.
+"""
+import decimal
+
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+
+def format_decimal(max_digits, decimal_places):
+    """
+    Formatter matching serializers.DecimalField(max_digits, decimal_places).
+    """
+    exponent = decimal.Decimal('.1') ** decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = max_digits
+
+    if not api_settings.COERCE_DECIMAL_TO_STRING:
+        return lambda value: value.quantize(exponent, context=context)
+    return lambda value: '{:f}'.format(value.quantize(exponent, context=context))
+
+
+def format_date(value):
+    return value.isoformat()
+
+
+def format_datetime(value):
+    """
+    Formatter matching serializers.DateTimeField with the ISO 8601 output format.
+    """
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class ValuesSerializer:
+    """
+    Base class. Subclasses set ``fields`` to a list of (name, path, formatter) triples;
+    the formatter may be None (value used as is), a callable, the name of a method,
+    or another ValuesSerializer class, which is then nested under the path as prefix.
+    ``None`` values stay ``None``, like in DRF.
+    """
+    fields = []
+    # Nested serializers return None when this path is None
+    null_check = 'id'
+
+    def __init__(self, fields=None, omit=None, prefix='', context=None):
+        self.prefix = prefix
+        self.context = context or {}
+        self.compiled = []
+        for name, path, formatter in self.fields:
+            if (fields and name not in fields) or (omit and name in omit):
+                continue
+            if isinstance(formatter, type) and issubclass(formatter, ValuesSerializer):
+                self.compiled.append((name, None, formatter(prefix=f'{prefix}{path}__', context=self.context)))
+                continue
+            if isinstance(formatter, str):
+                # Name of a method, for formatters that need the context
+                formatter = getattr(self, formatter)
+            self.compiled.append((name, prefix + path, formatter))
+
+    def value_paths(self):
+        paths = [f'{self.prefix}{self.null_check}']
+        for name, path, formatter in self.compiled:
+            if path is None:
+                paths += formatter.value_paths()
+            else:
+                paths.append(path)
+        return list(dict.fromkeys(paths))
+
+    def values(self, queryset, *extra):
+        """
+        The ``.values()`` queryset this serializer reads. Annotations of ``queryset`` and
+        ``extra`` paths (e.g. sort keys for keyset pagination) are selected as well.
+        """
+        return queryset.values(*dict.fromkeys(self.value_paths() + list(extra) + list(queryset.query.annotations)))
+
+    def to_representation(self, row):
+        if self.prefix and row[self.prefix + self.null_check] is None:
+            return None
+        ret = {}
+        for name, path, formatter in self.compiled:
+            if path is None:
+                ret[name] = formatter.to_representation(row)
+                continue
+            value = row[path]
+            ret[name] = value if value is None or formatter is None else formatter(value)
+        return ret
+
+    def prefetch(self, rows):
+        """
+        Hook to load related data for a whole page of rows with one query per relation.
+        """
+
+    def many(self, rows):
+        rows = list(rows)
+        self.prefetch(rows)
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
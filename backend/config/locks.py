@@ -0,0 +1,18 @@
+"""
+Transaction-level PostgreSQL advisory locks.
+"""
+from django.db import connection
+
+# Advisory lock keys are 32-bit; colliding ids only serialize a little more
+KEY_MODULUS = 2 ** 31 - 1
+
+
+def advisory_xact_lock(namespace, keys):
+    """
+    Takes the advisory lock (namespace, key) for every key, in sorted order so two
+    callers cannot deadlock. The locks are released when the transaction ends, so
+    this must run inside one.
+    """
+    with connection.cursor() as cursor:
+        for key in sorted({key % KEY_MODULUS for key in keys}):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [namespace, key])
@@ -0,0 +1,181 @@
+"""
+Pagination classes shared by the API apps.
+
+Keyset ("seek") pagination encodes the sort values of the last row of a page in an
+opaque cursor and continues with ``WHERE (sort columns) < cursor``. Page N therefore
+costs the same as page 1, and no COUNT(*) is run.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.gis.measure import Distance
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, Distance):
+        return {'m': value.m}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'm' in value:
+        return Distance(m=value['m'])
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over a unique ordering, by default ``(-created_at, -id)``.
+
+    Views can override the ordering with a ``keyset_ordering`` attribute. The last
+    field must be unique (usually ``id``) so that ties are broken deterministically.
+    """
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering to seek on.
+        """
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        """
+        Returns the list of sort values in the cursor, or None for the first page.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.current_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return [_decode_value(value) for value in values]
+
+    def encode_cursor(self, row):
+        values = []
+        for field in self.current_ordering:
+            name = field.lstrip('-')
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(_encode_value(value))
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def seek_filter(self, values):
+        """
+        Builds the lexicographic "after this row" condition:
+        (a < x) OR (a = x AND b < y) OR ...
+        """
+        condition = Q()
+        for i, field in enumerate(self.current_ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for previous, value in zip(self.current_ordering[:i], values[:i]):
+                clause &= Q(**{previous.lstrip('-'): value})
+            condition |= clause
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.current_ordering = self.get_ordering(request, queryset, view)
+
+        queryset = queryset.order_by(*self.current_ordering)
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values))
+
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the request carries a ``cursor`` parameter;
+    an empty ``?cursor=`` starts keyset pagination at the first page.
+    """
+    keyset_class = KeysetPagination
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class KeysetListMixin:
+    """
+    For custom list actions that historically return a plain array.
+    Paginates with keyset pagination when ``?cursor=`` is passed, otherwise
+    keeps returning the full list.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def keyset_list_response(self, queryset, values_serializer=None):
+        """
+        With a ``values_serializer`` (see config.fast_serializers) the rows are read
+        with ``.values()`` and rendered without model instances.
+        """
+        paginator = self.keyset_pagination_class()
+        if values_serializer is not None:
+            sort_keys = [field.lstrip('-') for field in paginator.get_ordering(self.request, queryset, self)]
+            queryset = values_serializer.values(queryset, *sort_keys)
+            serialize = values_serializer.many
+        else:
+            def serialize(rows):
+                return self.get_serializer(rows, many=True).data
+
+        if paginator.cursor_query_param not in self.request.query_params:
+            return Response(serialize(queryset))
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(serialize(page))
@@ -5,6 +5,7 @@ Django settings for the MyCraft project.
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.gis",
+    "django.contrib.postgres",
 
     # Third-party apps
     "corsheaders",
@@ -94,6 +96,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory by default; docker-compose points DJANGO_CACHE_BACKEND/LOCATION at Redis.
+# The map tile and services response caches are invalidated from the geocoder process
+# too, so they are only used with a shared backend (see config/caching.py).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'mycraft'),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,6 +138,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Django REST Framework settings
 REST_FRAMEWORK = {
+    # orjson-backed, byte-identical to DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
     ),
@@ -166,3 +184,27 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
+# Geocoding (Nominatim) cache, see jobs/geocoding.py
+GEOCODING_CACHE_TTL = int(os.environ.get('GEOCODING_CACHE_TTL', 60 * 60 * 24 * 30))
+GEOCODING_NEGATIVE_CACHE_TTL = int(os.environ.get('GEOCODING_NEGATIVE_CACHE_TTL', 60 * 60 * 24))
+GEOCODING_MEMORY_CACHE_SIZE = 2048
+# Minimum seconds between two Nominatim requests of the geocode_jobs worker
+GEOCODING_MIN_INTERVAL = float(os.environ.get('GEOCODING_MIN_INTERVAL', 1.0))
+# Seconds between checks whether the offline gazetteer (jobs.Place) was re-imported
+GAZETTEER_RELOAD_INTERVAL = 300
+# Seconds a typeahead prefix stays cached
+TYPEAHEAD_CACHE_TTL = 60
+# Seconds a map cluster tile stays cached (tiles are also dropped when a job in them changes)
+MAP_CLUSTER_CACHE_TTL = 60 * 60
+# Seconds an anonymous services list/detail response stays cached (dropped on every job change)
+SERVICES_RESPONSE_CACHE_TTL = 60 * 10
+# Seconds a stored Idempotency-Key response can be replayed
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+# Craftsman search: Bayesian prior (mean rating, weight in reviews) and score penalty per km
+CRAFTSMAN_RANKING_PRIOR_MEAN = 3.5
+CRAFTSMAN_RANKING_PRIOR_WEIGHT = 5
+CRAFTSMAN_RANKING_DISTANCE_PENALTY = 0.02
+# Pub/sub backend of the chat WebSocket (see chat/realtime.py); in-process fan-out needs a single worker
+CHAT_BROKER = 'chat.realtime.InProcessBroker'
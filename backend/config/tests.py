@@ -0,0 +1,36 @@
+"""Tests for the shared config helpers."""
+
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """
+    Output of ORJSONRenderer compared with DRF's JSONRenderer.
+    """
+
+    def render(self, data):
+        return ORJSONRenderer().render(data), JSONRenderer().render(data)
+
+    def test_api_data_renders_identically(self):
+        data = {'id': 1, 'price': Decimal('250.00'), 'title': 'Bad fliesen', 'tags': [None, True, 0.1]}
+        fast, standard = self.render(data)
+        self.assertEqual(fast, standard)
+
+    def test_integers_beyond_64_bits_fall_back_to_the_standard_renderer(self):
+        fast, standard = self.render({'id': 2 ** 64})
+        self.assertEqual(fast, standard)
+
+    def test_non_finite_floats_render_as_null(self):
+        self.assertEqual(ORJSONRenderer().render({'score': float('nan')}), b'{"score":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'score': float('nan')})
+
+    def test_float_exponents_are_formatted_differently(self):
+        fast, standard = self.render([1e16, 1e-05])
+        self.assertEqual(fast, b'[1e16,0.00001]')
+        self.assertEqual(standard, b'[1e+16,1e-05]')
@@ -1,6 +1,6 @@
 from django.contrib.gis import admin
 
-from .models import Booking, Job
+from .models import Booking, GeocodeCache, IdempotencyKey, Job, Place
 
 
 @admin.register(Job)
@@ -9,7 +9,7 @@ class JobAdmin(admin.OSMGeoAdmin):
     Admin view for Services (Jobs) with OpenStreetMap integration.
     """
     list_display = ('title', 'contractor', 'status', 'created_at')
-    list_filter = ('status', 'trade')
+    list_filter = ('status', 'trade', 'geocoding_status')
     search_fields = ('title', 'description', 'city')
 
     # Configure the map
@@ -26,3 +26,31 @@ class BookingAdmin(admin.ModelAdmin):
     list_display = ('service', 'customer', 'contractor', 'status', 'price', 'created_at')
     list_filter = ('status',)
     search_fields = ('service__title', 'customer__username', 'contractor__username')
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    """
+    Admin view for cached geocoding answers.
+    """
+    list_display = ('query_key', 'latitude', 'longitude', 'expires_at')
+    search_fields = ('query_key',)
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    """
+    Admin view for the offline postcode gazetteer.
+    """
+    list_display = ('postcode', 'name', 'state')
+    search_fields = ('postcode', 'name')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """
+    Admin view for stored Idempotency-Key responses.
+    """
+    list_display = ('key', 'user', 'status_code', 'created_at', 'expires_at')
+    search_fields = ('key', 'user__username')
+    readonly_fields = ('user', 'key', 'fingerprint', 'status_code', 'response_body', 'created_at', 'expires_at')
@@ -0,0 +1,111 @@
+"""
+Contractor calendar: busy days of a contractor as per-month bitmaps.
+
+A month is one integer in which bit ``day - 1`` is set when the contractor has an
+active (pending or confirmed) booking on that day, e.g. ``{"month": "2026-10", "busy": 5}``
+means busy on the 1st and the 3rd.
+"""
+from datetime import date, timedelta
+
+from django.utils.dateparse import parse_date
+
+from .models import Booking
+
+# Longest range one calendar request may cover
+MAX_RANGE_DAYS = 366
+DEFAULT_RANGE_DAYS = 90
+MAX_CHECK_DATES = 100
+
+
+class CalendarError(ValueError):
+    pass
+
+
+def parse_day(value, field):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CalendarError(f"{field}: Ungültiges Datum, erwartet wird JJJJ-MM-TT.")
+    return day
+
+
+def parse_range(start, end, today):
+    """
+    Returns the (start, end) dates of a `?from=&to=` query, both inclusive.
+    Defaults to today and the following DEFAULT_RANGE_DAYS days.
+    """
+    start = parse_day(start, 'from') if start else today
+    end = parse_day(end, 'to') if end else start + timedelta(days=DEFAULT_RANGE_DAYS)
+    if end < start:
+        raise CalendarError("'to' darf nicht vor 'from' liegen.")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise CalendarError(f"Der Zeitraum darf höchstens {MAX_RANGE_DAYS} Tage umfassen.")
+    return start, end
+
+
+def parse_dates(value):
+    """
+    Parses the comma-separated `?dates=` of a batch check.
+    """
+    days = [parse_day(part.strip(), 'dates') for part in value.split(',') if part.strip()]
+    if not days:
+        raise CalendarError("dates: Mindestens ein Datum ist erforderlich.")
+    if len(days) > MAX_CHECK_DATES:
+        raise CalendarError(f"dates: Höchstens {MAX_CHECK_DATES} Daten pro Anfrage.")
+    return days
+
+
+def busy_days(contractor_id, start=None, end=None, days=None):
+    """
+    The distinct days with active bookings of a contractor, sorted, deduplicated by the
+    database. Restricted to [start, end] and/or to the given days.
+    """
+    queryset = Booking.objects.filter(contractor_id=contractor_id, status__in=Booking.ACTIVE_STATUSES)
+    if start is not None:
+        queryset = queryset.filter(scheduled_date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(scheduled_date__lte=end)
+    if days is not None:
+        queryset = queryset.filter(scheduled_date__in=days)
+    return list(
+        queryset.exclude(scheduled_date=None)
+        .order_by('scheduled_date')
+        .values_list('scheduled_date', flat=True)
+        .distinct()
+    )
+
+
+def month_bitmaps(busy, start, end):
+    """
+    Turns the busy days into one entry per month of [start, end].
+    """
+    months = {}
+    month = date(start.year, start.month, 1)
+    while month <= end:
+        months[(month.year, month.month)] = 0
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    for day in busy:
+        months[(day.year, day.month)] |= 1 << (day.day - 1)
+    return [
+        {'month': f'{year:04d}-{number:02d}', 'busy': bits}
+        for (year, number), bits in months.items()
+    ]
+
+
+def calendar(contractor_id, start, end):
+    return {
+        'contractor': contractor_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'months': month_bitmaps(busy_days(contractor_id, start, end), start, end),
+    }
+
+
+def check_dates(contractor_id, days):
+    """
+    Maps every requested day to whether the contractor is still free, with one query.
+    """
+    busy = set(busy_days(contractor_id, days=days))
+    return {day.isoformat(): day not in busy for day in days}
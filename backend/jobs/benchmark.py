@@ -0,0 +1,225 @@
+"""
+Synthetic marketplace data for the benchmark and query-plan management commands.
+
+Everything created here belongs to users whose username starts with BENCH_PREFIX,
+so it can be removed again with ``cleanup()``.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.utils import timezone
+
+from chat import unread
+from chat.models import Conversation, Message, Offer
+from .models import Booking, Job
+
+BENCH_PREFIX = 'bench_'
+
+TITLES = [
+    'Badsanierung komplett', 'Fliesen verlegen', 'Heizung warten', 'Rohrbruch reparieren',
+    'Steckdosen installieren', 'Sicherungskasten erneuern', 'Wohnung streichen', 'Fassade lackieren',
+    'Laminat verlegen', 'Einbauküche montieren', 'Treppe abschleifen', 'Hecke schneiden',
+    'Rasen mähen', 'Gartenteich anlegen', 'Dachrinne reinigen', 'Tapezieren und Spachteln',
+    'Wasserhahn austauschen', 'Lampen anschließen', 'Möbel aufbauen', 'Terrasse bauen',
+]
+
+PHRASES = [
+    'schnell und zuverlässig', 'mit Garantie', 'inklusive Material', 'auch am Wochenende',
+    'Meisterbetrieb aus der Region', 'kostenlose Anfahrt im Stadtgebiet', 'saubere Arbeit',
+    'faire Festpreise', 'langjährige Erfahrung', 'Notdienst verfügbar',
+]
+
+# (city, postcode, lat, lng)
+CITIES = [
+    ('Berlin', '10115', 52.5200, 13.4050), ('Hamburg', '20095', 53.5511, 9.9937),
+    ('München', '80331', 48.1351, 11.5820), ('Köln', '50667', 50.9375, 6.9603),
+    ('Frankfurt am Main', '60311', 50.1109, 8.6821), ('Stuttgart', '70173', 48.7758, 9.1829),
+    ('Düsseldorf', '40213', 51.2277, 6.7735), ('Leipzig', '04109', 51.3397, 12.3731),
+    ('Dortmund', '44135', 51.5136, 7.4653), ('Bremen', '28195', 53.0793, 8.8017),
+]
+
+
+def get_users(role, count):
+    """
+    Returns ``count`` benchmark users of a role ('contractor', 'customer'), creating the missing ones.
+    """
+    prefix = f'{BENCH_PREFIX}{role}_'
+    existing = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    missing = [
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com')
+        for i in range(len(existing), count)
+    ]
+    for user in missing:
+        # Regular save, so the profile signal runs
+        user.save()
+    return (existing + missing)[:count]
+
+
+def get_contractors(count):
+    """
+    Returns ``count`` benchmark contractors, creating the missing ones.
+    """
+    return get_users('contractor', count)
+
+
+def seed_jobs(count, contractors, rng=None, batch_size=5000):
+    """
+    Bulk-inserts ``count`` jobs spread over the benchmark contractors and ten German cities.
+    """
+    rng = rng or random.Random(42)
+    trades = [code for code, _label in Job.Trade.choices]
+    today = timezone.now().date()
+
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            city, postcode, lat, lng = rng.choice(CITIES)
+            title = rng.choice(TITLES)
+            batch.append(Job(
+                title=f'{title} in {city}',
+                description=' '.join([title] + rng.sample(PHRASES, 3)),
+                trade=rng.choice(trades),
+                address=f'Hauptstraße {rng.randint(1, 200)}, {postcode} {city}',
+                location=Point(lng + rng.uniform(-0.3, 0.3), lat + rng.uniform(-0.2, 0.2), srid=4326),
+                execution_date=today + timedelta(days=rng.randint(0, 180)),
+                price=Decimal(rng.randint(20, 2000)),
+                status=Job.Status.OPEN if rng.random() < 0.9 else Job.Status.PAUSED,
+                contractor=rng.choice(contractors),
+            ))
+        Job.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def seed_bookings(count, customers, rng=None, batch_size=5000):
+    """
+    Bulk-inserts up to ``count`` bookings of benchmark jobs. Active bookings never share
+    a (contractor, day), matching the rule enforced for real bookings.
+    """
+    rng = rng or random.Random(42)
+    jobs = list(
+        Job.objects.filter(contractor__username__startswith=BENCH_PREFIX)
+        .values_list('id', 'contractor_id', 'price')[:50000]
+    )
+    if not jobs:
+        return 0
+
+    statuses = [Booking.Status.PENDING, Booking.Status.CONFIRMED, Booking.Status.COMPLETED, Booking.Status.CANCELLED]
+    active = {Booking.Status.PENDING, Booking.Status.CONFIRMED}
+    today = timezone.now().date()
+    taken = set()
+
+    batch, created = [], 0
+    for _ in range(count):
+        job_id, contractor_id, price = rng.choice(jobs)
+        status = rng.choices(statuses, weights=[2, 3, 4, 1])[0]
+        scheduled = today + timedelta(days=rng.randint(-365, 180))
+        if status in active:
+            if (contractor_id, scheduled) in taken:
+                continue
+            taken.add((contractor_id, scheduled))
+        batch.append(Booking(
+            service_id=job_id, customer=rng.choice(customers), contractor_id=contractor_id,
+            status=status, price=price or Decimal('0'), scheduled_date=scheduled,
+        ))
+        if len(batch) >= batch_size:
+            Booking.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    Booking.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def seed_conversations(count, customers, rng=None, messages=10, batch_size=5000):
+    """
+    Bulk-inserts ``count`` conversations about benchmark jobs, each between a customer
+    and the job's contractor, with ``messages`` alternating messages (every fifth one an offer).
+    """
+    rng = rng or random.Random(42)
+    jobs = list(
+        Job.objects.filter(contractor__username__startswith=BENCH_PREFIX)
+        .values_list('id', 'contractor_id')[:5000]
+    )
+    if not jobs:
+        return []
+
+    conversations = Conversation.objects.bulk_create([
+        Conversation(job_id=rng.choice(jobs)[0]) for _ in range(count)
+    ], batch_size=batch_size)
+    Participant = Conversation.participants.through
+    job_contractors = dict(jobs)
+    participants, offers, rows = [], [], []
+    for conversation in conversations:
+        customer = rng.choice(customers)
+        contractor_id = job_contractors[conversation.job_id]
+        participants += [
+            Participant(conversation_id=conversation.id, user_id=customer.id),
+            Participant(conversation_id=conversation.id, user_id=contractor_id),
+        ]
+        for i in range(messages):
+            sender_id = customer.id if i % 2 == 0 else contractor_id
+            offer = None
+            if i % 5 == 4:
+                offer = Offer(conversation_id=conversation.id, creator_id=sender_id,
+                              price=Decimal(rng.randint(50, 2000)), description='Angebot')
+                offers.append(offer)
+            rows.append((conversation.id, sender_id, None if offer else f'Nachricht {i}', offer))
+    Participant.objects.bulk_create(participants, batch_size=batch_size)
+    Offer.objects.bulk_create(offers, batch_size=batch_size)
+    created = Message.objects.bulk_create([
+        Message(conversation_id=conversation_id, sender_id=sender_id, content=content, offer=offer)
+        for conversation_id, sender_id, content, offer in rows
+    ], batch_size=batch_size)
+
+    # bulk_create skips the signal that copies the latest message into the conversation
+    last_messages = {message.conversation_id: message for message in created}
+    for conversation in conversations:
+        message = last_messages.get(conversation.id)
+        if message is not None:
+            conversation.last_message_at = conversation.updated_at = message.timestamp
+            conversation.last_message_preview = message.preview()
+            conversation.last_sender_id = message.sender_id
+    Conversation.objects.bulk_update(
+        conversations, ['last_message_at', 'last_message_preview', 'last_sender', 'updated_at'],
+        batch_size=batch_size
+    )
+    # ... and the ones that count the messages as unread
+    unread.rebuild({participant.user_id for participant in participants})
+    return conversations
+
+
+def analyze(*tables):
+    """
+    Refreshes planner statistics after bulk inserts.
+    """
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+
+def timed(func, repeat=20):
+    """
+    Runs ``func`` ``repeat`` times and returns (median_ms, p95_ms).
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(len(samples) * 0.95)) - 1)]
+    return statistics.median(samples), p95
+
+
+def cleanup():
+    """
+    Deletes all benchmark users and, by cascade, everything they own.
+    """
+    return User.objects.filter(username__startswith=BENCH_PREFIX).delete()
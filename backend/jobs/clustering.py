@@ -0,0 +1,131 @@
+"""
+Server-side map clustering on slippy-map tiles (Web Mercator z/x/y).
+
+Every tile is split into a GRID x GRID grid and the OPEN jobs inside it are grouped
+per cell in PostGIS (count, centroid, dominant trade). Results are cached per tile;
+saving or deleting a job drops the cached tiles that contain it on every zoom level.
+Tiles are only cached in a cache shared by all processes (see config/caching.py).
+"""
+import math
+
+from django.conf import settings
+from django.contrib.gis.db.models import Collect, PointField
+from django.contrib.gis.db.models.functions import Centroid, SnapToGrid
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db.models import Count, Min
+from django.db.models.functions import Cast
+
+from config import caching
+from .expressions import Mode
+
+MAX_ZOOM = 18
+GRID = 8
+MAX_TILES = 64
+CACHE_TTL = getattr(settings, 'MAP_CLUSTER_CACHE_TTL', 60 * 60)
+
+# Web Mercator is undefined at the poles
+MAX_LAT = 85.0511
+
+
+def tile_for(lng, lat, zoom):
+    """
+    Returns the (x, y) of the tile containing a coordinate.
+    """
+    n = 2 ** zoom
+    lat = max(min(lat, MAX_LAT), -MAX_LAT)
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Returns (west, south, east, north) of a tile in degrees.
+    """
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tiles_for_bbox(west, south, east, north, zoom):
+    """
+    Lists the (z, x, y) tiles covering a bounding box.
+    """
+    x_min, y_min = tile_for(west, north, zoom)
+    x_max, y_max = tile_for(east, south, zoom)
+    return [
+        (zoom, x, y)
+        for x in range(x_min, x_max + 1)
+        for y in range(y_min, y_max + 1)
+    ]
+
+
+def cache_key(zoom, x, y):
+    return f'map_clusters:{zoom}:{x}:{y}'
+
+
+def cluster_tile(queryset, zoom, x, y):
+    """
+    Groups the jobs of one tile into grid cells with a single grouped query.
+    """
+    west, south, east, north = tile_bounds(zoom, x, y)
+    rows = (
+        queryset.filter(location__intersects=Polygon.from_bbox((west, south, east, north)))
+        .annotate(geom=Cast('location', output_field=PointField(srid=4326)))
+        .annotate(cell=SnapToGrid('geom', (east - west) / GRID, (north - south) / GRID, west, south))
+        .values('cell')
+        .annotate(count=Count('id'), center=Centroid(Collect('geom')), trade=Mode('trade'), first_id=Min('id'))
+        .order_by()
+    )
+    clusters = []
+    for row in rows:
+        cluster = {
+            'count': row['count'],
+            'lat': round(row['center'].y, 6),
+            'lng': round(row['center'].x, 6),
+            'trade': row['trade'],
+        }
+        if row['count'] == 1:
+            # Single pins link straight to the service
+            cluster['id'] = row['first_id']
+        clusters.append(cluster)
+    return clusters
+
+
+def get_clusters(queryset, tiles):
+    """
+    Returns the clusters of several tiles, computing only the ones not cached yet.
+    """
+    if not caching.is_shared():
+        return [cluster for tile in tiles for cluster in cluster_tile(queryset, *tile)]
+
+    keys = {tile: cache_key(*tile) for tile in tiles}
+    cached = cache.get_many(list(keys.values()))
+
+    clusters, missing = [], {}
+    for tile, key in keys.items():
+        if key in cached:
+            clusters += cached[key]
+        else:
+            missing[key] = cluster_tile(queryset, *tile)
+            clusters += missing[key]
+
+    if missing:
+        cache.set_many(missing, CACHE_TTL)
+    return clusters
+
+
+def invalidate_point(point):
+    """
+    Drops the cached tiles containing ``point`` on every zoom level.
+    """
+    if not caching.is_shared():
+        return
+    cache.delete_many([
+        cache_key(zoom, *tile_for(point.x, point.y, zoom))
+        for zoom in range(MAX_ZOOM + 1)
+    ])
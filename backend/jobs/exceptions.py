@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Partial unique constraint on Booking: one active booking per contractor and day
+BOOKING_DAY_CONSTRAINT = 'booking_contractor_day_active_uniq'
+
+
+class BookingConflict(APIException):
+    """
+    The contractor is already booked on that day (HTTP 409).
+    The body keeps the shape of the former validation error, {"scheduled_date": [...]}.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {'scheduled_date': ['Der Handwerker ist an diesem Datum bereits ausgebucht.']}
+    default_code = 'booking_conflict'
+
+
+def is_booking_conflict(error):
+    """
+    True if an IntegrityError was raised by the one-booking-per-day constraint.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == BOOKING_DAY_CONSTRAINT or BOOKING_DAY_CONSTRAINT in str(error)
+
+
+@contextmanager
+def booking_conflicts():
+    """
+    Runs the block atomically and turns a violated day constraint into BookingConflict.
+    Everything written in the block is rolled back on conflict.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        if is_booking_conflict(e):
+            raise BookingConflict()
+        raise
@@ -0,0 +1,27 @@
+"""
+Database expressions that Django does not ship.
+"""
+from django.contrib.gis.db.models.functions import GeoFunc
+from django.db.models import Aggregate, FloatField
+
+
+class KNNDistance(GeoFunc):
+    """
+    The PostGIS ``<->`` distance operator.
+
+    In ORDER BY ... LIMIT it lets the GiST index on the geometry column return the
+    nearest rows directly, instead of computing and sorting every distance.
+    """
+    arg_joiner = ' <-> '
+    template = '%(expressions)s'
+    output_field = FloatField()
+    geom_param_pos = (0, 1)
+
+
+class Mode(Aggregate):
+    """
+    ``MODE() WITHIN GROUP (ORDER BY expr)``: the most frequent value of a group.
+    """
+    function = 'MODE'
+    name = 'Mode'
+    template = '%(function)s() WITHIN GROUP (ORDER BY %(expressions)s)'
@@ -0,0 +1,103 @@
+"""
+Values serializers for the hot job and booking list endpoints and the craftsman search.
+
+Each class with a DRF counterpart in serializers.py renders exactly what it renders;
+`manage.py benchmark_serializers` checks that the bytes are identical.
+"""
+from config.fast_serializers import ValuesSerializer, format_date, format_datetime, format_decimal
+from users.models import Profile
+
+format_price = format_decimal(10, 2)
+
+
+class ProfilePictureMixin:
+    """
+    ``format_picture`` renders a stored profile picture name like serializers.ImageField:
+    as absolute URL when the context has a request.
+    """
+
+    def format_picture(self, name):
+        if not name:
+            return None
+        url = Profile._meta.get_field('profile_picture').storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class JobListValuesSerializer(ValuesSerializer):
+    """
+    Counterpart of JobListSerializer.
+    """
+    fields = [
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('trade', 'trade', None),
+        ('status', 'status', None),
+        ('price', 'price', format_price),
+        ('execution_date', 'execution_date', format_date),
+        ('address', 'address', None),
+        ('city', 'city', None),
+        # DRF falls back to a ModelField, which renders the EWKT string
+        ('location', 'location', str),
+        ('contractor', 'contractor', None),
+        ('contractor_username', 'contractor__username', None),
+        ('created_at', 'created_at', format_datetime),
+    ]
+
+
+class JobSummaryValuesSerializer(ValuesSerializer):
+    """
+    Counterpart of JobSummarySerializer.
+    """
+    fields = [
+        ('id', 'id', None),
+        ('title', 'title', None),
+        ('trade', 'trade', None),
+        ('status', 'status', None),
+        ('price', 'price', format_price),
+        ('address', 'address', None),
+        ('zip_code', 'zip_code', None),
+        ('city', 'city', None),
+        ('contractor', 'contractor', None),
+        ('contractor_username', 'contractor__username', None),
+    ]
+
+
+class BookingValuesSerializer(ValuesSerializer):
+    """
+    Counterpart of BookingSerializer (read side).
+    """
+    fields = [
+        ('id', 'id', None),
+        ('service', 'service', JobSummaryValuesSerializer),
+        ('customer', 'customer', None),
+        ('customer_name', 'customer__username', None),
+        ('contractor', 'contractor', None),
+        ('status', 'status', None),
+        ('price', 'price', format_price),
+        ('scheduled_date', 'scheduled_date', format_date),
+        ('created_at', 'created_at', format_datetime),
+        ('review', 'review__id', None),
+    ]
+
+
+class CraftsmanRankingValuesSerializer(ProfilePictureMixin, ValuesSerializer):
+    """
+    Rows of the craftsman search; reads the ranking joined with user and profile.
+    """
+    fields = [
+        ('contractor', 'contractor', None),
+        ('username', 'contractor__username', None),
+        ('company_name', 'contractor__profile__company_name', None),
+        ('city', 'contractor__profile__city', None),
+        ('profile_picture', 'contractor__profile__profile_picture', 'format_picture'),
+        ('trade', 'trade', None),
+        ('service_count', 'service_count', None),
+        ('average_rating', 'average_rating', None),
+        ('review_count', 'rating_count', None),
+        ('score', 'score', None),
+        ('distance_km', 'distance', 'format_distance'),
+    ]
+
+    def format_distance(self, distance):
+        return round(distance.km, 2)
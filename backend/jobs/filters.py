@@ -0,0 +1,85 @@
+"""
+Filters and facet counts for the services listing.
+"""
+import django_filters
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from .models import Job
+
+# (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ('0-50', 0, 50),
+    ('50-100', 50, 100),
+    ('100-250', 100, 250),
+    ('250-500', 250, 500),
+    ('500-1000', 500, 1000),
+    ('1000+', 1000, None),
+]
+NO_PRICE = 'none'
+
+
+class JobFilterSet(django_filters.FilterSet):
+    """
+    Typed filters for Job listings.
+
+    Query parameters: trade, status, price_min, price_max,
+    execution_date_after, execution_date_before (YYYY-MM-DD).
+    """
+    trade = django_filters.ChoiceFilter(choices=Job.Trade.choices)
+    status = django_filters.ChoiceFilter(choices=Job.Status.choices)
+    price = django_filters.RangeFilter()
+    execution_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Job
+        fields = ['trade', 'status', 'price', 'execution_date']
+
+
+def price_bucket_expression():
+    """
+    CASE expression mapping a job's price to its PRICE_BUCKETS label.
+    """
+    whens = []
+    for label, low, high in PRICE_BUCKETS:
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        whens.append(When(condition, then=Value(label)))
+    return Case(*whens, default=Value(NO_PRICE), output_field=CharField())
+
+
+def facet_counts(filterset):
+    """
+    Counts the jobs per trade and per price bucket with a single GROUP BY
+    (trade, bucket) query. Each facet ignores its own filter, so the trade facet
+    still lists the other trades while one is selected (and likewise for price).
+    """
+    filterset.is_valid()
+    data = filterset.form.cleaned_data
+    queryset = filterset.queryset
+    for name, value in data.items():
+        if name not in ('trade', 'price'):
+            queryset = filterset.filters[name].filter(queryset, value)
+
+    in_trade = Q(trade=data['trade']) if data.get('trade') else Q()
+    in_price = Q()
+    price = data.get('price')
+    if price and price.start is not None:
+        in_price &= Q(price__gte=price.start)
+    if price and price.stop is not None:
+        in_price &= Q(price__lte=price.stop)
+
+    trades = {code: 0 for code, _label in Job.Trade.choices}
+    prices = {label: 0 for label, _low, _high in PRICE_BUCKETS}
+    prices[NO_PRICE] = 0
+
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values('trade', 'price_bucket')
+        .annotate(in_price=Count('id', filter=in_price or None), in_trade=Count('id', filter=in_trade or None))
+    )
+    for row in rows:
+        trades[row['trade']] = trades.get(row['trade'], 0) + row['in_price']
+        prices[row['price_bucket']] += row['in_trade']
+    return {'trade': trades, 'price': prices}
@@ -0,0 +1,251 @@
+"""
+Offline gazetteer of German postcodes and places.
+
+The Place table is loaded once per process into an in-memory prefix index, so
+postcode/city lookups for the radius search and the address autocomplete never
+leave the process. Full street addresses still go to Nominatim.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db.models import Count, Max
+
+# How often a process checks whether the Place table was re-imported
+RELOAD_INTERVAL = getattr(settings, 'GAZETTEER_RELOAD_INTERVAL', 300)
+# Entries of one name and state closer than this belong to the same place
+PLACE_RADIUS_KM = 30
+
+POSTCODE_RE = re.compile(r'^(\d{5})(?:\s+(\D.*))?$')
+STREET_RE = re.compile(
+    r'(str\.|stra(ss|ß)e\b|weg\b|platz\b|allee\b|gasse\b|ring\b|damm\b|ufer\b|chaussee\b)',
+    re.IGNORECASE,
+)
+
+Entry = namedtuple('Entry', 'postcode name state lat lng')
+
+UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue'})
+
+
+def normalize_name(name):
+    """
+    Folds case and umlauts, so "Köln", "KÖLN" and "koeln" share one key.
+    """
+    text = unicodedata.normalize('NFKC', str(name or '')).casefold().translate(UMLAUTS)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def is_street_address(query):
+    """
+    True if the query looks like more than a postcode or a place name
+    (commas, house numbers, street suffixes). Those are left to Nominatim.
+    """
+    text = str(query or '').strip()
+    if ',' in text or STREET_RE.search(text):
+        return True
+    # Any number that is not a leading 5-digit postcode is most likely a house number
+    rest = POSTCODE_RE.sub(lambda m: m.group(2) or '', text)
+    return bool(re.search(r'\d', rest))
+
+
+class GazetteerIndex:
+    """
+    Sorted-key prefix index over postcodes and normalized place names.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        by_postcode = {}
+        by_name = {}
+        for entry in entries:
+            by_postcode.setdefault(entry.postcode, []).append(entry)
+            by_name.setdefault(normalize_name(entry.name), []).append(entry)
+
+        self._by_postcode = by_postcode
+        self._by_name = by_name
+        self._postcode_keys = sorted(by_postcode)
+        self._name_keys = sorted(by_name)
+        self._postcode_centroids = {key: self._centroid(group) for key, group in by_postcode.items()}
+        # Homonyms ("Neustadt") are separate places, biggest (most postcodes) first
+        self._name_places = {key: self._places(group) for key, group in by_name.items()}
+        self._name_centroids = {key: self._significant_centroid(places) for key, places in self._name_places.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _centroid(group):
+        return (
+            sum(entry.lng for entry in group) / len(group),
+            sum(entry.lat for entry in group) / len(group),
+        )
+
+    @staticmethod
+    def _places(group):
+        """
+        Splits the entries of one name into places: same state and within
+        ``PLACE_RADIUS_KM`` of the place's first entry. Biggest place first.
+        """
+        places = []
+        for entry in sorted(group, key=lambda entry: entry.postcode):
+            for place in places:
+                first = place[0]
+                # Equirectangular approximation, plenty for distances inside Germany
+                dx = (entry.lng - first.lng) * 111.32 * math.cos(math.radians(first.lat))
+                dy = (entry.lat - first.lat) * 110.57
+                if entry.state == first.state and math.hypot(dx, dy) <= PLACE_RADIUS_KM:
+                    place.append(entry)
+                    break
+            else:
+                places.append([entry])
+        return sorted(places, key=len, reverse=True)
+
+    @classmethod
+    def _significant_centroid(cls, places):
+        """
+        Centroid of the biggest place, or None if the name is ambiguous
+        (two places with the same number of postcodes).
+        """
+        if len(places) > 1 and len(places[0]) == len(places[1]):
+            return None
+        return cls._centroid(places[0])
+
+    @staticmethod
+    def _prefixed(keys, prefix):
+        """
+        Yields all keys starting with ``prefix`` (keys must be sorted).
+        """
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            yield keys[i]
+
+    def resolve(self, query):
+        """
+        Returns the centroid of a postcode ("50667", "50667 Köln") or place name ("Köln").
+        None if unknown or ambiguous, so callers fall back to Nominatim.
+        """
+        text = str(query or '').strip()
+        match = POSTCODE_RE.match(text)
+        if match:
+            coords = self._postcode_centroids.get(match.group(1))
+        else:
+            coords = self._name_centroids.get(normalize_name(text))
+        if coords is None:
+            return None
+        return Point(coords[0], coords[1], srid=4326)
+
+    def suggest(self, query, limit=5):
+        """
+        Autocompletes a postcode or place-name prefix.
+        Results use the same shape as the Nominatim suggestions of JobViewSet.suggest_address.
+        """
+        text = str(query or '').strip()
+        results = []
+
+        match = POSTCODE_RE.match(text)
+        if match and match.group(2):
+            # "50667 Kö" -> places of that postcode matching the name prefix
+            prefix = normalize_name(match.group(2))
+            for entry in self._by_postcode.get(match.group(1), []):
+                if normalize_name(entry.name).startswith(prefix):
+                    results.append(self._as_suggestion(entry, entry.lng, entry.lat))
+            return results[:limit]
+
+        if text.isdigit():
+            for postcode in self._prefixed(self._postcode_keys, text):
+                for entry in self._by_postcode[postcode]:
+                    results.append(self._as_suggestion(entry, entry.lng, entry.lat))
+                    if len(results) >= limit:
+                        return results
+            return results
+
+        prefix = normalize_name(text)
+        if not prefix:
+            return results
+        # Bigger places (more postcodes) first, homonyms as separate suggestions
+        places = sorted(
+            (place for key in self._prefixed(self._name_keys, prefix) for place in self._name_places[key]),
+            key=lambda place: -len(place),
+        )
+        for place in places[:limit]:
+            lng, lat = self._centroid(place)
+            results.append(self._as_suggestion(place[0], lng, lat, single=len(place) == 1))
+        return results
+
+    @staticmethod
+    def _as_suggestion(entry, lng, lat, single=True):
+        zip_code = entry.postcode if single else ''
+        return {
+            'display_name': f"{zip_code} {entry.name}, {entry.state}".strip(' ,'),
+            'road': '',
+            'house_number': '',
+            'zip_code': zip_code,
+            'city': entry.name,
+            'lat': lat,
+            'lng': lng,
+        }
+
+
+_lock = threading.Lock()
+_index = None
+_signature = None
+_checked_at = float('-inf')
+
+
+def _table_signature():
+    Place = apps.get_model('jobs', 'Place')
+    stats = Place.objects.aggregate(count=Count('id'), last=Max('id'))
+    return stats['count'], stats['last']
+
+
+def get_index():
+    """
+    Returns the process-wide index, (re)loading it when the Place table changed.
+    """
+    global _index, _signature, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _index
+
+    with _lock:
+        if _index is not None and now - _checked_at < RELOAD_INTERVAL:
+            return _index
+        signature = _table_signature()
+        if _index is None or signature != _signature:
+            Place = apps.get_model('jobs', 'Place')
+            rows = Place.objects.order_by().values_list('postcode', 'name', 'state', 'latitude', 'longitude')
+            _index = GazetteerIndex([Entry(*row) for row in rows.iterator(chunk_size=5000)])
+            _signature = signature
+        _checked_at = now
+        return _index
+
+
+def invalidate():
+    """
+    Forces the next lookup to reload the index (used after an import).
+    """
+    global _checked_at
+    with _lock:
+        _checked_at = float('-inf')
+
+
+def resolve(query):
+    """
+    Shortcut for ``get_index().resolve(query)``.
+    """
+    return get_index().resolve(query)
+
+
+def suggest(query, limit=5):
+    """
+    Shortcut for ``get_index().suggest(query, limit)``.
+    """
+    return get_index().suggest(query, limit)
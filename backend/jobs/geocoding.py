@@ -0,0 +1,252 @@
+"""
+Geocoding layer shared by the service search and Job.save.
+
+Lookups are answered from an in-process LRU first, then from the GeocodeCache
+table and only then from Nominatim. "No result" answers are cached as well
+(with a shorter TTL), so unknown places do not hit the network on every request.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from geopy.exc import GeopyError
+from geopy.geocoders import Nominatim
+
+logger = logging.getLogger(__name__)
+
+# User Agent should be unique for our project (Nominatim usage policy)
+USER_AGENT = getattr(settings, 'GEOCODING_USER_AGENT', 'mycraft_backend_app_prod')
+TIMEOUT = getattr(settings, 'GEOCODING_TIMEOUT', 10)
+
+# Positive answers hardly ever change, negative ones may (new streets, typos fixed upstream)
+CACHE_TTL = getattr(settings, 'GEOCODING_CACHE_TTL', 60 * 60 * 24 * 30)
+NEGATIVE_CACHE_TTL = getattr(settings, 'GEOCODING_NEGATIVE_CACHE_TTL', 60 * 60 * 24)
+MEMORY_CACHE_SIZE = getattr(settings, 'GEOCODING_MEMORY_CACHE_SIZE', 2048)
+
+# Matches the length of GeocodeCache.query_key
+MAX_KEY_LENGTH = 255
+
+
+class GeocodingError(Exception):
+    """
+    Raised when the geocoding service could not be reached or failed.
+    Such failures are never cached.
+    """
+
+
+class _LRUCache:
+    """
+    Small thread-safe LRU with a per-entry expiry time.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (hit, value). Expired entries count as a miss and are dropped.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory_cache = _LRUCache(MEMORY_CACHE_SIZE)
+
+_stats_lock = threading.Lock()
+_stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'errors': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    """
+    Returns a snapshot of the hit/miss counters of this process.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset(stats=True):
+    """
+    Empties the in-process cache (and optionally the counters).
+    The database cache is left untouched.
+    """
+    _memory_cache.clear()
+    if stats:
+        with _stats_lock:
+            for name in _stats:
+                _stats[name] = 0
+
+
+def normalize_query(query):
+    """
+    Normalizes a free-text place query so equivalent spellings share one cache entry.
+
+    "  Köln ,50667 " and "köln, 50667" both become "köln, 50667".
+    """
+    text = unicodedata.normalize('NFKC', str(query or '')).casefold()
+    text = re.sub(r'\s*,\s*', ', ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip(' ,')
+
+
+def make_key(query, country_codes=None):
+    """
+    Builds the cache key for a query. Returns an empty string for empty queries.
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return ''
+    key = f"{country_codes or '*'}|{normalized}"
+    if len(key) > MAX_KEY_LENGTH:
+        key = 'sha1|' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return key
+
+
+def _to_point(coords):
+    """
+    Cached values are plain (lng, lat) tuples; every caller gets its own Point.
+    """
+    if coords is None:
+        return None
+    return Point(coords[0], coords[1], srid=4326)
+
+
+def _cache_model():
+    return apps.get_model('jobs', 'GeocodeCache')
+
+
+def _read_db(key):
+    """
+    Returns (hit, coords, remaining_ttl) from the database cache.
+    """
+    try:
+        entry = _cache_model().objects.filter(query_key=key, expires_at__gt=timezone.now()).first()
+    except DatabaseError as e:
+        logger.warning("Geocoding cache read failed for '%s': %s", key, e)
+        return False, None, 0
+    if entry is None:
+        return False, None, 0
+
+    coords = None
+    if entry.longitude is not None and entry.latitude is not None:
+        coords = (entry.longitude, entry.latitude)
+    remaining = (entry.expires_at - timezone.now()).total_seconds()
+    return True, coords, remaining
+
+
+def _write_db(key, coords, ttl):
+    """
+    Persists an answer. A failing write must never break the caller's transaction,
+    hence the savepoint.
+    """
+    lng, lat = coords if coords is not None else (None, None)
+    try:
+        with transaction.atomic():
+            _cache_model().objects.update_or_create(
+                query_key=key,
+                defaults={
+                    'longitude': lng,
+                    'latitude': lat,
+                    'expires_at': timezone.now() + timedelta(seconds=ttl),
+                },
+            )
+    except DatabaseError as e:
+        logger.warning("Geocoding cache write failed for '%s': %s", key, e)
+
+
+def get_cached(query, country_codes=None):
+    """
+    Looks a query up in the in-process and database caches without touching the network.
+
+    Returns:
+        tuple: (hit, point). ``point`` is None for a cached "no result".
+    """
+    key = make_key(query, country_codes)
+    if not key:
+        return True, None
+
+    hit, coords = _memory_cache.get(key)
+    if hit:
+        _count('memory_hits')
+        return True, _to_point(coords)
+
+    hit, coords, remaining = _read_db(key)
+    if hit:
+        _count('db_hits')
+        # Keep the in-process copy no longer than the persistent one
+        _memory_cache.set(key, coords, min(remaining, CACHE_TTL))
+        return True, _to_point(coords)
+
+    return False, None
+
+
+def geocode(query, country_codes=None):
+    """
+    Resolves a free-text place query to a Point (SRID 4326).
+
+    Args:
+        query (str): Address, city name or postcode.
+        country_codes (str): Optional Nominatim country restriction (e.g. 'de').
+
+    Returns:
+        Point: The location, or None if the geocoder knows no such place.
+
+    Raises:
+        GeocodingError: If Nominatim could not be queried.
+    """
+    hit, point = get_cached(query, country_codes)
+    if hit:
+        return point
+
+    _count('misses')
+    key = make_key(query, country_codes)
+    try:
+        geolocator = Nominatim(user_agent=USER_AGENT)
+        loc = geolocator.geocode(query, timeout=TIMEOUT, country_codes=country_codes)
+    except GeopyError as e:
+        _count('errors')
+        raise GeocodingError(str(e)) from e
+
+    if loc:
+        coords, ttl = (loc.longitude, loc.latitude), CACHE_TTL
+    else:
+        coords, ttl = None, NEGATIVE_CACHE_TTL
+
+    _memory_cache.set(key, coords, ttl)
+    _write_db(key, coords, ttl)
+    return _to_point(coords)
@@ -0,0 +1,102 @@
+"""
+`Idempotency-Key` support for POST endpoints that clients retry.
+
+The first request with a key runs the view and stores its response under (user, key),
+in the same transaction as the view's own writes. A retry finds the stored response
+with one lookup on the unique (user, key) index and gets it back unchanged, without
+validation or inserts. A retry arriving while the first request is still running waits
+on that index until the first one commits, then replays its response. Requests whose
+view raises (validation errors, booking conflicts) store nothing and may be retried.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode('utf-8')).hexdigest()
+
+
+def replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def claim(user, key, fingerprint):
+    """
+    Returns (record, created). Runs inside the caller's transaction.
+    """
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None:
+        if record.expires_at > timezone.now():
+            return record, False
+        record.delete()
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint,
+                expires_at=timezone.now() + timedelta(seconds=TTL),
+            )
+        return record, True
+    except IntegrityError:
+        # A concurrent request with the same key committed first
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+
+def idempotent(view_method):
+    """
+    Decorator for ViewSet methods handling a POST. Without the header nothing changes.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response(
+                {'detail': f'{HEADER} muss 1 bis 255 Zeichen lang sein.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            record, created = claim(request.user, key, fingerprint)
+            if not created:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {'detail': f'Dieser {HEADER} wurde bereits für eine andere Anfrage verwendet.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                return replay(record)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                # Server errors may be retried for real
+                record.delete()
+            else:
+                record.status_code = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=['status_code', 'response_body'])
+            return response
+
+    return wrapper
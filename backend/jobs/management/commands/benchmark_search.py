@@ -0,0 +1,73 @@
+import random
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from jobs import benchmark
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    """
+    Compares the old icontains text search with the full-text search on growing catalogues.
+
+    All benchmark data is inserted inside a transaction that is rolled back at the end,
+    unless --keep is given.
+
+    Usage:
+        python manage.py benchmark_search --sizes 100000 1000000
+    """
+    help = "Benchmarks icontains vs. full-text search on the services listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--terms', nargs='+', default=['Fliesen', 'Heizung warten', 'Küche'])
+        parser.add_argument('--contractors', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded jobs.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(42)
+        contractors = benchmark.get_contractors(options['contractors'])
+        seeded = 0
+
+        for size in sorted(options['sizes']):
+            self.stdout.write(f"Seeding up to {size} jobs ...")
+            seeded += benchmark.seed_jobs(size - seeded, contractors, rng)
+            benchmark.analyze('jobs_job')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{size} jobs"))
+            for term in options['terms']:
+                for name, queryset in (('icontains', self.icontains(term)), ('fulltext', self.fulltext(term))):
+                    # Same work as one listing request: COUNT(*) plus the first page
+                    median, p95 = benchmark.timed(
+                        lambda qs=queryset: (qs.count(), list(qs[:10])), options['repeat']
+                    )
+                    self.stdout.write(f"  {term!r:18} {name:10} median {median:8.2f} ms   p95 {p95:8.2f} ms")
+
+    @staticmethod
+    def base():
+        return Job.objects.filter(status=Job.Status.OPEN)
+
+    def icontains(self, term):
+        """
+        The search as it was before the search_vector column.
+        """
+        return self.base().filter(Q(title__icontains=term) | Q(description__icontains=term))
+
+    def fulltext(self, term):
+        """
+        The search as JobViewSet.get_queryset runs it now.
+        """
+        query = SearchQuery(term, config='german', search_type='websearch')
+        return self.base().filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at')
@@ -0,0 +1,107 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from chat.fast_serializers import ConversationListValuesSerializer
+from chat.models import Conversation
+from chat.serializers import ConversationListSerializer
+from config.renderers import ORJSONRenderer
+from jobs import benchmark
+from jobs.fast_serializers import BookingValuesSerializer, JobListValuesSerializer
+from jobs.models import Booking, Job
+from jobs.serializers import BookingSerializer, JobListSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compares the DRF serializers of the hot list endpoints with their values serializers.
+
+    For every endpoint the same rows are rendered twice: ModelSerializer + JSONRenderer
+    and ValuesSerializer + ORJSONRenderer, each including its database queries. The
+    command fails if the bytes differ. Benchmark data is seeded inside a transaction
+    that is always rolled back.
+
+    Usage:
+        python manage.py benchmark_serializers --objects 10000
+    """
+    help = "Checks the fast read serializers for byte-identical output and measures their speed-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objects', type=int, default=10000, help="Rows rendered per endpoint.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            failures = self.run(options)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Output differs for: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All fast serializers render byte-identical output."))
+
+    def run(self, options):
+        count = options['objects']
+        rng = random.Random(42)
+        contractors = benchmark.get_contractors(200)
+        customers = benchmark.get_users('customer', 500)
+
+        self.stdout.write(f"Seeding {count} jobs, bookings and conversations ...")
+        benchmark.seed_jobs(count, contractors, rng)
+        # Roughly half of the bookings are skipped to keep active days unique per contractor
+        benchmark.seed_bookings(count * 2, customers, rng)
+        benchmark.seed_conversations(count, customers, rng, messages=5)
+        benchmark.analyze('jobs_job', 'jobs_booking', 'chat_conversation',
+                          'chat_conversation_participants', 'chat_message', 'chat_offer')
+
+        request = Request(APIRequestFactory().get('/api/'))
+        context = {'request': request}
+        failures = []
+        for name, drf, fast in self.endpoints(count, context):
+            drf_bytes, fast_bytes = drf(), fast()
+            identical = drf_bytes == fast_bytes
+            if not identical:
+                failures.append(name)
+
+            drf_median, _p95 = benchmark.timed(drf, options['repeat'])
+            fast_median, _p95 = benchmark.timed(fast, options['repeat'])
+            status = self.style.SUCCESS('identical') if identical else self.style.ERROR('DIFFERENT')
+            self.stdout.write(
+                f"  {name:14} {len(drf_bytes):>10} bytes  {status}   "
+                f"drf {drf_median:8.1f} ms   fast {fast_median:8.1f} ms   x{drf_median / fast_median:5.1f}"
+            )
+        return failures
+
+    def endpoints(self, count, context):
+        """
+        (name, DRF render function, fast render function) for every hot list endpoint.
+        """
+        def drf(serializer_class, queryset):
+            return lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True, context=context).data)
+
+        def fast(serializer_class, queryset):
+            serializer = serializer_class(context=context)
+            return lambda: ORJSONRenderer().render(serializer.many(serializer.values(queryset.all())))
+
+        bench = {'contractor__username__startswith': benchmark.BENCH_PREFIX}
+
+        jobs = Job.objects.filter(**bench).order_by('-created_at', '-id')[:count]
+        bookings = Booking.objects.filter(**bench).order_by('-created_at', '-id')[:count]
+        conversations = Conversation.objects.filter(job__contractor__username__startswith=benchmark.BENCH_PREFIX)
+        conversations = conversations.order_by('-updated_at', '-id')[:count]
+
+        participants = User.objects.select_related('profile').order_by('id')
+        return [
+            ('jobs', drf(JobListSerializer, jobs.select_related('contractor')),
+             fast(JobListValuesSerializer, jobs)),
+            ('bookings', drf(BookingSerializer, bookings.select_related('service__contractor', 'customer', 'review')),
+             fast(BookingValuesSerializer, bookings)),
+            ('conversations', drf(ConversationListSerializer, conversations.select_related('job__contractor')
+                                  .prefetch_related(Prefetch('participants', queryset=participants))),
+             fast(ConversationListValuesSerializer, conversations)),
+        ]
@@ -0,0 +1,150 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs import gazetteer, geocoding
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Nominatim usage policy: at most one request per second
+MIN_INTERVAL = getattr(settings, 'GEOCODING_MIN_INTERVAL', 1.0)
+
+# How long a claimed batch stays invisible to other workers
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+RETRY_BASE_DELAY = 30  # seconds, doubled on every failed attempt
+RETRY_MAX_DELAY = 6 * 60 * 60
+
+
+class Command(BaseCommand):
+    """
+    Background worker that resolves the coordinates of jobs saved with a pending geocoding state.
+
+    Usage:
+        python manage.py geocode_jobs            # run forever
+        python manage.py geocode_jobs --once     # drain the queue once and exit
+    """
+    help = "Geocodes pending jobs in batches, respecting the Nominatim rate limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=8)
+        parser.add_argument('--idle-sleep', type=float, default=15.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Process everything that is due and exit.")
+
+    def handle(self, *args, **options):
+        self.max_attempts = options['max_attempts']
+        self._last_request = 0.0
+        totals = {'done': 0, 'retry': 0, 'failed': 0}
+
+        while True:
+            batch = self.claim_batch(options['batch_size'])
+            if not batch:
+                if options['once']:
+                    break
+                time.sleep(options['idle_sleep'])
+                continue
+
+            for job in batch:
+                totals[self.process(job)] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            "Geocoded {done} job(s), {retry} scheduled for retry, {failed} failed.".format(**totals)
+        ))
+
+    def claim_batch(self, size):
+        """
+        Locks the next due jobs and pushes their next attempt into the future,
+        so parallel workers never pick the same rows.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(geocoding_status=Job.GeocodingStatus.PENDING, geocoding_next_attempt_at__lte=now)
+                .order_by('geocoding_next_attempt_at')[:size]
+            )
+            if jobs:
+                Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    geocoding_next_attempt_at=now + CLAIM_TIMEOUT
+                )
+        return jobs
+
+    def throttle(self):
+        """
+        Sleeps until the next request is allowed by the rate limit.
+        """
+        wait = self._last_request + MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def process(self, job):
+        """
+        Resolves a single job. Returns 'done', 'retry' or 'failed'.
+        """
+        query = job.geocoding_query()
+        pending = Job.objects.filter(pk=job.pk, geocoding_status=Job.GeocodingStatus.PENDING)
+
+        if not job.address:
+            # Postcode + city only: the offline gazetteer knows the centroid
+            point = gazetteer.resolve(f"{job.zip_code} {job.city}")
+            hit = point is not None
+        else:
+            hit, point = geocoding.get_cached(query)
+        if not hit:
+            self.throttle()
+            try:
+                point = geocoding.geocode(query)
+            except geocoding.GeocodingError as e:
+                return self.schedule_retry(job, pending, e)
+
+        if point is None:
+            # A definite "no result" will not improve by asking again
+            logger.warning("No coordinates found for job %s ('%s')", job.pk, query)
+            pending.update(
+                geocoding_status=Job.GeocodingStatus.FAILED,
+                geocoding_attempts=job.geocoding_attempts + 1,
+                geocoding_next_attempt_at=None,
+            )
+            return 'failed'
+
+        # Regular save, so signal handlers see the new location
+        job.location = point
+        job.geocoding_status = Job.GeocodingStatus.DONE
+        job.geocoding_attempts += 1
+        job.geocoding_next_attempt_at = None
+        job.save(update_fields=[
+            'location', 'geocoding_status', 'geocoding_attempts', 'geocoding_next_attempt_at', 'updated_at'
+        ])
+        return 'done'
+
+    def schedule_retry(self, job, pending, error):
+        """
+        Backs off exponentially; gives up after --max-attempts.
+        """
+        attempts = job.geocoding_attempts + 1
+        if attempts >= self.max_attempts:
+            logger.error("Giving up geocoding job %s after %s attempts: %s", job.pk, attempts, error)
+            pending.update(
+                geocoding_status=Job.GeocodingStatus.FAILED,
+                geocoding_attempts=attempts,
+                geocoding_next_attempt_at=None,
+            )
+            return 'failed'
+
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        logger.warning("Geocoding job %s failed (attempt %s), retrying in %ss: %s", job.pk, attempts, delay, error)
+        pending.update(
+            geocoding_attempts=attempts,
+            geocoding_next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        )
+        return 'retry'
@@ -0,0 +1,81 @@
+import csv
+import io
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jobs import gazetteer
+from jobs.models import Place
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    """
+    Imports the offline postcode gazetteer used by the radius search and address suggestions.
+
+    Expects the GeoNames postal code dump for Germany (https://download.geonames.org/export/zip/DE.zip),
+    either zipped or as the extracted tab-separated DE.txt.
+
+    Usage:
+        python manage.py import_gazetteer DE.zip --replace
+    """
+    help = "Imports German postcodes and places (GeoNames postal code format)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="DE.zip or DE.txt from the GeoNames postal code export.")
+        parser.add_argument('--replace', action='store_true',
+                            help="Delete all existing places before importing.")
+        parser.add_argument('--country', default='DE')
+
+    def handle(self, *args, **options):
+        try:
+            rows = list(self.read_rows(options['path'], options['country']))
+        except (OSError, zipfile.BadZipFile) as e:
+            raise CommandError(f"Could not read '{options['path']}': {e}")
+
+        if not rows:
+            raise CommandError("No places found in the file.")
+
+        with transaction.atomic():
+            if options['replace']:
+                Place.objects.all().delete()
+            for start in range(0, len(rows), BATCH_SIZE):
+                Place.objects.bulk_create(rows[start:start + BATCH_SIZE], ignore_conflicts=True)
+
+        gazetteer.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(rows)} places, {Place.objects.count()} in the gazetteer."
+        ))
+
+    def open_text(self, path):
+        """
+        Returns a text stream for either the zip archive or the plain dump.
+        """
+        if zipfile.is_zipfile(path):
+            archive = zipfile.ZipFile(path)
+            names = [name for name in archive.namelist() if name.endswith('.txt') and 'readme' not in name.lower()]
+            if not names:
+                raise CommandError("The archive does not contain a .txt dump.")
+            return io.TextIOWrapper(archive.open(names[0]), encoding='utf-8')
+        return open(path, encoding='utf-8')
+
+    def read_rows(self, path, country):
+        """
+        Yields unsaved Place objects. Columns: country, postcode, place name, state, ..., lat, lng, accuracy.
+        """
+        seen = set()
+        with self.open_text(path) as stream:
+            for line in csv.reader(stream, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if len(line) < 11 or line[0] != country:
+                    continue
+                postcode, name, state = line[1].strip(), line[2].strip(), line[3].strip()
+                if len(postcode) != 5 or not name or (postcode, name) in seen:
+                    continue
+                try:
+                    lat, lng = float(line[9]), float(line[10])
+                except ValueError:
+                    continue
+                seen.add((postcode, name))
+                yield Place(postcode=postcode, name=name[:180], state=state[:100], latitude=lat, longitude=lng)
@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs import benchmark
+from jobs.models import Booking, Job
+
+
+class Command(BaseCommand):
+    """
+    Concurrent load test of booking creation.
+
+    Many customers POST /api/bookings/ in parallel threads (each with its own database
+    connection) for a handful of days of a few contractors, so most requests collide.
+    Fails if any day ends up double-booked, if a collision is answered with anything
+    but 409, or if any request errors. Benchmark users and their data are deleted at
+    the end.
+
+    Usage:
+        python manage.py load_test_bookings --threads 32 --requests 5000
+    """
+    help = "Hammers booking creation concurrently and checks that no day is booked twice."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--contractors', type=int, default=5)
+        parser.add_argument('--days', type=int, default=10, help="Distinct days requested per contractor.")
+        parser.add_argument('--customers', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            self.run(options)
+        finally:
+            benchmark.cleanup()
+
+    def run(self, options):
+        rng = random.Random(42)
+        contractors = benchmark.get_contractors(options['contractors'])
+        customers = benchmark.get_users('customer', options['customers'])
+        benchmark.seed_jobs(options['contractors'] * 2, contractors, rng)
+        jobs = list(Job.objects.filter(contractor__in=contractors).values_list('id', flat=True))
+        start = timezone.now().date() + timedelta(days=1)
+        days = [(start + timedelta(days=i)).isoformat() for i in range(options['days'])]
+
+        plan = [
+            (rng.choice(customers), rng.choice(jobs), rng.choice(days))
+            for _ in range(options['requests'])
+        ]
+        local = threading.local()
+
+        def book(item):
+            customer, job_id, day = item
+            client = getattr(local, 'client', None) or APIClient()
+            local.client = client
+            client.force_authenticate(customer)
+            response = client.post('/api/bookings/', {'service_id': job_id, 'scheduled_date': day}, format='json')
+            return response.status_code
+
+        def worker(chunk):
+            try:
+                return [book(item) for item in chunk]
+            finally:
+                connection.close()
+
+        threads = options['threads']
+        chunks = [plan[i::threads] for i in range(threads)]
+        self.stdout.write(f"{len(plan)} booking requests from {threads} threads ...")
+        began = time.perf_counter()
+        # The test client talks to the full request stack as host 'testserver'
+        with override_settings(ALLOWED_HOSTS=['testserver']), ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = Counter(code for codes in pool.map(worker, chunks) for code in codes)
+        elapsed = time.perf_counter() - began
+
+        self.stdout.write(f"  {len(plan) / elapsed:8.1f} requests/s   statuses: {dict(sorted(statuses.items()))}")
+
+        double_booked = (
+            Booking.objects.filter(contractor__in=contractors, status__in=Booking.ACTIVE_STATUSES)
+            .values('contractor_id', 'scheduled_date')
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .order_by()
+            .count()
+        )
+        booked = Booking.objects.filter(contractor__in=contractors).count()
+        self.stdout.write(f"  {booked} bookings created, {double_booked} double-booked days")
+
+        unexpected = {code: n for code, n in statuses.items() if code not in (201, 409)}
+        if double_booked or unexpected or statuses[201] != booked:
+            raise CommandError(f"Load test failed: {double_booked} double-booked days, unexpected statuses {unexpected}")
+        self.stdout.write(self.style.SUCCESS("No double bookings."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired Idempotency-Key responses.
+
+    Usage:
+        python manage.py purge_idempotency_keys
+    """
+    help = "Deletes expired Idempotency-Key responses."
+
+    def handle(self, *args, **options):
+        deleted, _by_model = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired idempotency keys deleted."))
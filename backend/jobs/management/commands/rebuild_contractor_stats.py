@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from jobs import stats
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the dashboard statistics (ContractorStats, ContractorMonthlyRevenue)
+    from bookings and offers, e.g. after bulk imports that bypass the signals.
+
+    Usage:
+        python manage.py rebuild_contractor_stats
+        python manage.py rebuild_contractor_stats --contractor 12 --contractor 15
+    """
+    help = "Recomputes the incrementally maintained contractor statistics."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contractor', type=int, action='append', dest='contractors',
+                            help="Only this contractor (user id). Can be repeated.")
+
+    def handle(self, *args, **options):
+        count = stats.rebuild(options['contractors'])
+        self.stdout.write(self.style.SUCCESS(f"Statistics of {count} contractors rebuilt."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from jobs import ranking
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the craftsman search ranking (CraftsmanRanking) from the OPEN services
+    and profile rating counters, e.g. after bulk imports that bypass the signals or
+    after changing the CRAFTSMAN_RANKING_* settings.
+
+    Usage:
+        python manage.py rebuild_craftsman_ranking
+        python manage.py rebuild_craftsman_ranking --contractor 12 --contractor 15
+    """
+    help = "Recomputes the precomputed craftsman search ranking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contractor', type=int, action='append', dest='contractors',
+                            help="Only this contractor (user id). Can be repeated.")
+
+    def handle(self, *args, **options):
+        count = ranking.rebuild(options['contractors'])
+        self.stdout.write(self.style.SUCCESS(f"{count} ranking rows rebuilt."))
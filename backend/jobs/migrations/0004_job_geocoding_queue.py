@@ -0,0 +1,45 @@
+# Generated by Django 4.2.27 on 2026-10-17 10:03
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def queue_missing_locations(apps, schema_editor):
+    """
+    Hands every job that has an address but no coordinates to the geocoding worker.
+    """
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(location__isnull=True).filter(
+        ~Q(address='') | (~Q(city='') & ~Q(zip_code=''))
+    ).update(geocoding_status='PENDING', geocoding_next_attempt_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geocoding_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='geocoding_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='geocoding_status',
+            field=models.CharField(choices=[('NONE', 'Nicht erforderlich'), ('PENDING', 'Ausstehend'), ('DONE', 'Erledigt'), ('FAILED', 'Fehlgeschlagen')], default='NONE', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('geocoding_status', 'PENDING')), fields=['geocoding_next_attempt_at'], name='job_geocoding_queue_idx'),
+        ),
+        migrations.RunPython(queue_missing_locations, migrations.RunPython.noop),
+    ]
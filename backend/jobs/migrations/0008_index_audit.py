@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:05
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so the tables stay writable
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jobs', '0007_job_title_trgm'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(fields=['status', 'trade', '-created_at'], name='job_status_trade_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['-created_at', '-id'], name='job_open_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(fields=['contractor', '-created_at'], name='job_contractor_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['customer', '-created_at'], name='booking_customer_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['contractor', '-created_at'], name='booking_contr_created_idx'),
+        ),
+    ]
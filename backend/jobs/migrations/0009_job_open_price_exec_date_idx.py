@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0008_index_audit'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['price'], name='job_open_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['execution_date'], name='job_open_exec_date_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-17 15:55
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+ACTIVE = ['PENDING', 'CONFIRMED']
+
+
+def cancel_double_bookings(apps, schema_editor):
+    """
+    Keeps the earliest active booking per contractor and day and cancels the others,
+    so the unique constraint can be created.
+    """
+    Booking = apps.get_model('jobs', 'Booking')
+    duplicates = (
+        Booking.objects.filter(status__in=ACTIVE, scheduled_date__isnull=False)
+        .values('contractor_id', 'scheduled_date')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        Booking.objects.filter(
+            contractor_id=row['contractor_id'], scheduled_date=row['scheduled_date'], status__in=ACTIVE
+        ).exclude(id=row['first_id']).update(status='CANCELLED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_job_open_price_exec_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'CONFIRMED'])), fields=('contractor', 'scheduled_date'), name='booking_contractor_day_active_uniq'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:05
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+PRIOR_MEAN = 3.5
+PRIOR_WEIGHT = 5
+
+
+def build_ranking(apps, schema_editor):
+    """
+    Creates the ranking rows from the OPEN, geocoded services and the profile rating
+    counters, like jobs.ranking.rebuild at the time of this migration.
+    """
+    CraftsmanRanking = apps.get_model('jobs', 'CraftsmanRanking')
+    Job = apps.get_model('jobs', 'Job')
+    Profile = apps.get_model('users', 'Profile')
+
+    jobs = Job.objects.filter(status='OPEN', location__isnull=False)
+    counts = {
+        (row['contractor_id'], row['trade']): row['total']
+        for row in jobs.values('contractor_id', 'trade').annotate(total=models.Count('id')).order_by()
+    }
+    ratings = {
+        user_id: (rating_sum, rating_count)
+        for user_id, rating_sum, rating_count in Profile.objects.filter(
+            user_id__in={contractor for contractor, _trade in counts}
+        ).values_list('user_id', 'rating_sum', 'rating_count')
+    }
+    rows = []
+    for contractor, trade, location in (
+        jobs.order_by('contractor_id', 'trade', '-created_at', '-id')
+        .distinct('contractor_id', 'trade')
+        .values_list('contractor_id', 'trade', 'location')
+    ):
+        rating_sum, rating_count = ratings.get(contractor, (0, 0))
+        rows.append(CraftsmanRanking(
+            contractor_id=contractor, trade=trade, location=location,
+            service_count=counts[contractor, trade],
+            rating_count=rating_count,
+            average_rating=rating_sum / rating_count if rating_count else None,
+            score=(PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + rating_count),
+        ))
+    CraftsmanRanking.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jobs', '0013_contractorstats_contractormonthlyrevenue'),
+        ('users', '0002_profile_rating_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CraftsmanRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade', models.CharField(choices=[('PLUMBER', 'Sanitär & Heizung'), ('ELECTRICIAN', 'Elektrik'), ('PAINTER', 'Maler & Lackierer'), ('CARPENTER', 'Tischler & Schreiner'), ('GARDENER', 'Garten & Landschaftsbau'), ('OTHER', 'Sonstiges')], max_length=50)),
+                ('location', django.contrib.gis.db.models.fields.PointField(geography=True, srid=4326)),
+                ('service_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(blank=True, null=True)),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='craftsmanranking',
+            constraint=models.UniqueConstraint(fields=('contractor', 'trade'), name='ranking_contractor_trade_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='craftsmanranking',
+            index=models.Index(fields=['trade', '-score'], name='ranking_trade_score_idx'),
+        ),
+        migrations.RunPython(build_ranking, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,17 @@
 from django.contrib.auth.models import User
 from django.contrib.gis.db import models as gis_models
-from django.contrib.gis.geos import Point
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from geopy.geocoders import Nominatim
+
+from users.models import Profile
+from . import ranking, response_cache, stats
+from .clustering import invalidate_point
 
 
 class Job(models.Model):
@@ -22,6 +30,12 @@ class Job(models.Model):
         GARDENER = 'GARDENER', _('Garten & Landschaftsbau')
         OTHER = 'OTHER', _('Sonstiges')
 
+    class GeocodingStatus(models.TextChoices):
+        NONE = 'NONE', _('Nicht erforderlich')
+        PENDING = 'PENDING', _('Ausstehend')
+        DONE = 'DONE', _('Erledigt')
+        FAILED = 'FAILED', _('Fehlgeschlagen')
+
     title = models.CharField(max_length=100)
     description = models.TextField()
     trade = models.CharField(max_length=50, choices=Trade.choices, default=Trade.OTHER)
@@ -30,6 +44,13 @@ class Job(models.Model):
     address = models.CharField(max_length=255, blank=True)
     location = gis_models.PointField(geography=True, null=True, blank=True)
 
+    # Resolved in the background by the `geocode_jobs` management command
+    geocoding_status = models.CharField(
+        max_length=10, choices=GeocodingStatus.choices, default=GeocodingStatus.NONE
+    )
+    geocoding_attempts = models.PositiveSmallIntegerField(default=0)
+    geocoding_next_attempt_at = models.DateTimeField(null=True, blank=True)
+
     # Old location fields are now deprecated but kept for now to avoid breaking old code
     zip_code = models.CharField(max_length=5, blank=True)
     city = models.CharField(max_length=100, blank=True)
@@ -41,39 +62,134 @@ class Job(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     contractor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offered_services')
 
+    # Weighted title (A) + description (B) in the 'german' configuration.
+    # Maintained by a database trigger, see migration 0006.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = _("Service")
         verbose_name_plural = _("Services")
+        indexes = [
+            # Listing filters: status (+ trade), newest first
+            models.Index(fields=['status', 'trade', '-created_at'], name='job_status_trade_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='OPEN'),
+                name='job_open_created_idx',
+            ),
+            # Range filters of the listing (price_min/price_max, execution_date_after/_before)
+            models.Index(fields=['price'], condition=models.Q(status='OPEN'), name='job_open_price_idx'),
+            models.Index(fields=['execution_date'], condition=models.Q(status='OPEN'), name='job_open_exec_date_idx'),
+            # Contractor dashboard (my-jobs)
+            models.Index(fields=['contractor', '-created_at'], name='job_contractor_created_idx'),
+            GinIndex(fields=['search_vector'], name='job_search_vector_gin'),
+            # Typo-tolerant title search and typeahead (pg_trgm)
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='job_title_trgm'),
+            # Queue scan of the geocoding worker
+            models.Index(
+                fields=['geocoding_next_attempt_at'],
+                condition=models.Q(geocoding_status='PENDING'),
+                name='job_geocoding_queue_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the stored location, so cache invalidation can also clear the old map tile,
+        and the stored address, so only address changes queue the job for geocoding again.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = instance.__dict__.get('location')
+        instance._loaded_address_state = instance.address_state()
+        return instance
+
+    def address_state(self):
+        """
+        (address, zip_code, city) the geocoding query is built from,
+        or None if one of the fields is not loaded.
+        """
+        if {'address', 'zip_code', 'city'} - set(self.__dict__):
+            return None
+        return self.address, self.zip_code, self.city
+
+    def geocoding_query(self):
+        """
+        Returns the free-text address to geocode, or an empty string if there is none.
+        """
+        if self.address or (self.city and self.zip_code):
+            return f"{self.address}, {self.zip_code} {self.city}"
+        return ''
+
     def save(self, *args, **kwargs):
         """
-        Overrides the save method to perform geocoding if location is missing.
+        Overrides the save method to queue geocoding if location is missing.
+
+        The lookup itself never runs inside the request; the job is stored right away
+        and the `geocode_jobs` worker fills in `location` later. A stored job is only
+        queued again when its address changed, so edits of other fields keep a FAILED
+        job out of the queue.
         """
-        # Only geocode if location is missing AND address data is present
-        # IMPORTANT: We also check if the address has changed (optional for later)
-        if not self.location and (self.address or (self.city and self.zip_code)):
-            try:
-                # User Agent should be unique for your project
-                geolocator = Nominatim(user_agent="mycraft_backend_app_prod")
-
-                query = f"{self.address}, {self.zip_code} {self.city}"
-
-                # Increase timeout as Nominatim is sometimes slow
-                loc = geolocator.geocode(query, timeout=10)
-
-                if loc:
-                    self.location = Point(loc.longitude, loc.latitude)
-                else:
-                    print(f"GEOCODING WARNING: No coordinates found for '{query}'")
-            except Exception as e:
-                # Could also use logging.error() here
-                print(f"GEOCODING ERROR: {e}")
+        changed = []
+        loaded = getattr(self, '_loaded_address_state', None)
+        address_changed = self._state.adding or loaded is None or loaded != self.address_state()
+        if self.location:
+            if self.geocoding_status == self.GeocodingStatus.PENDING:
+                self.geocoding_status = self.GeocodingStatus.DONE
+                changed.append('geocoding_status')
+        elif address_changed and self.geocoding_query() and self.geocoding_status != self.GeocodingStatus.PENDING:
+            self.geocoding_status = self.GeocodingStatus.PENDING
+            self.geocoding_attempts = 0
+            self.geocoding_next_attempt_at = timezone.now()
+            changed += ['geocoding_status', 'geocoding_attempts', 'geocoding_next_attempt_at']
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and changed:
+            kwargs['update_fields'] = set(update_fields) | set(changed)
 
         super().save(*args, **kwargs)
+        self._loaded_address_state = self.address_state()
+
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_job_map_tiles(sender, instance, **kwargs):
+    """
+    Drops the cached map clusters of the tiles the job was and is located in.
+    """
+    previous = getattr(instance, '_loaded_location', None)
+    for point in (previous, instance.location):
+        if point:
+            invalidate_point(point)
+    instance._loaded_location = instance.location
+
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_service_responses(sender, instance, **kwargs):
+    """
+    Drops the cached anonymous services responses.
+    """
+    response_cache.bump_version()
+
+
+@receiver([post_save, post_delete], sender=Job)
+def update_craftsman_ranking(sender, instance, **kwargs):
+    """
+    Rebuilds the contractor's ranking rows (trades, locations, service counts).
+    """
+    ranking.rebuild([instance.contractor_id])
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_service_responses_for_profile(sender, instance, **kwargs):
+    """
+    Craftsman profiles are shown with their services, so changes drop the cached responses too.
+    """
+    if instance.is_craftsman:
+        response_cache.bump_version()
 
 
 class Booking(models.Model):
@@ -86,6 +202,9 @@ class Booking(models.Model):
         COMPLETED = 'COMPLETED', _('Erledigt')
         CANCELLED = 'CANCELLED', _('Storniert')
 
+    # Bookings that block the contractor's day
+    ACTIVE_STATUSES = [Status.PENDING, Status.CONFIRMED]
+
     service = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='bookings')
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings_made')
     contractor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings_received')
@@ -99,6 +218,185 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # my_bookings / my_orders
+            models.Index(fields=['customer', '-created_at'], name='booking_customer_created_idx'),
+            models.Index(fields=['contractor', '-created_at'], name='booking_contr_created_idx'),
+        ]
+        constraints = [
+            # A contractor can only have one active booking per day. Enforced by the database,
+            # so concurrent requests cannot double-book; its index also serves the calendar.
+            models.UniqueConstraint(
+                fields=['contractor', 'scheduled_date'],
+                condition=models.Q(status__in=['PENDING', 'CONFIRMED']),
+                name='booking_contractor_day_active_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"Booking {self.id} for {self.service.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the stored state, so the contractor statistics can be updated by difference.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stats_state = instance.stats_state()
+        return instance
+
+    def stats_state(self):
+        """
+        (contractor_id, status, price, revenue month) as counted in ContractorStats,
+        or None if one of the fields is not loaded.
+        """
+        if {'contractor_id', 'status', 'price', 'scheduled_date', 'created_at'} - set(self.__dict__):
+            return None
+        # Local date, like TruncDate('created_at') in stats.rebuild
+        day = self.scheduled_date or timezone.localdate(self.created_at or timezone.now())
+        return self.contractor_id, self.status, self.price, day.replace(day=1)
+
+
+@receiver(post_save, sender=Booking)
+def update_contractor_stats_on_save(sender, instance, created, **kwargs):
+    """
+    Applies the difference between the stored and the new booking state to the
+    contractor's counters and monthly revenue.
+    """
+    old = None if created else getattr(instance, '_loaded_stats_state', stats.UNKNOWN)
+    new = instance.stats_state()
+    stats.apply_booking_change(old, new if new is not None else stats.UNKNOWN, instance.contractor_id)
+    instance._loaded_stats_state = new
+
+
+@receiver(post_delete, sender=Booking)
+def update_contractor_stats_on_delete(sender, instance, **kwargs):
+    stats.apply_booking_change(getattr(instance, '_loaded_stats_state', stats.UNKNOWN), None, instance.contractor_id)
+
+
+class ContractorStats(models.Model):
+    """
+    Per-contractor counters for the dashboard, updated incrementally whenever a
+    booking or offer changes (see jobs/stats.py). Rebuilt with `rebuild_contractor_stats`.
+    """
+    contractor = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    pending_count = models.PositiveIntegerField(default=0)
+    confirmed_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    # Sum of the prices of completed bookings
+    revenue_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    open_offers = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats of {self.contractor_id}"
+
+
+class ContractorMonthlyRevenue(models.Model):
+    """
+    Revenue of completed bookings per contractor and month (month = first day of the
+    month of the scheduled date, or of the booking date if there is none).
+    """
+    contractor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_revenue')
+    month = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bookings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['contractor', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['contractor', 'month'], name='monthly_revenue_contractor_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.contractor_id} {self.month:%Y-%m}: {self.revenue}"
+
+
+class CraftsmanRanking(models.Model):
+    """
+    One row per craftsman and trade they offer OPEN services in, with a precomputed
+    Bayesian rating score (see jobs/ranking.py). Rebuilt with `rebuild_craftsman_ranking`.
+    """
+    contractor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rankings')
+    trade = models.CharField(max_length=50, choices=Job.Trade.choices)
+    # Location of the craftsman's newest service in this trade
+    location = gis_models.PointField(geography=True)
+    service_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(null=True, blank=True)
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contractor', 'trade'], name='ranking_contractor_trade_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['trade', '-score'], name='ranking_trade_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contractor_id} {self.trade}: {self.score:.2f}"
+
+
+class GeocodeCache(models.Model):
+    """
+    Persistent geocoding answers, keyed by the normalized query.
+    A row without coordinates records that the geocoder found nothing.
+    """
+    query_key = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        if self.latitude is None:
+            return f"{self.query_key} (no result)"
+        return f"{self.query_key} ({self.latitude}, {self.longitude})"
+
+
+class Place(models.Model):
+    """
+    Offline gazetteer entry: a German postcode/place pair with its centroid.
+    Imported with the `import_gazetteer` management command.
+    """
+    postcode = models.CharField(max_length=5, db_index=True)
+    name = models.CharField(max_length=180)
+    state = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        ordering = ['postcode', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['postcode', 'name'], name='place_postcode_name_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.postcode} {self.name}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response of a POST sent with an `Idempotency-Key` header.
+    Retries with the same key get this response back instead of repeating the write.
+    See jobs/idempotency.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # Hash of method, path and body; a key may not be reused for a different request
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status_code})"
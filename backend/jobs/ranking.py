@@ -0,0 +1,135 @@
+"""
+Craftsman ranking for the "best <trade> near me" search.
+
+Every craftsman gets one CraftsmanRanking row per trade they offer OPEN services in,
+with the location of their newest service in that trade and a Bayesian rating score:
+
+    score = (PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + rating_count)
+
+so a single 5-star review does not outrank a hundred 4.8s. The search combines the
+score with the distance from the customer (``DISTANCE_PENALTY`` stars per km) in one
+query on the ranking table, using its spatial index for the radius.
+
+Job changes rebuild the contractor's rows, review changes only recompute the score
+(see the receivers in jobs/models.py and reviews/models.py). Rebuilds of the same
+contractor are serialized with an advisory lock and write their rows in place.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.db import connection, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField
+
+from config.locks import advisory_xact_lock
+
+PRIOR_MEAN = getattr(settings, 'CRAFTSMAN_RANKING_PRIOR_MEAN', 3.5)
+PRIOR_WEIGHT = getattr(settings, 'CRAFTSMAN_RANKING_PRIOR_WEIGHT', 5)
+DISTANCE_PENALTY = getattr(settings, 'CRAFTSMAN_RANKING_DISTANCE_PENALTY', 0.02)
+OPEN = 'OPEN'
+ROW_FIELDS = ['location', 'service_count', 'rating_count', 'average_rating', 'score', 'updated_at']
+# Advisory lock namespace of the per-contractor rebuild
+LOCK_NAMESPACE = 1020
+
+
+def bayesian_score(rating_sum, rating_count):
+    return (PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + rating_count)
+
+
+def _rating_fields(rating_sum, rating_count):
+    return {
+        'rating_count': rating_count,
+        'average_rating': rating_sum / rating_count if rating_count else None,
+        'score': bayesian_score(rating_sum, rating_count),
+    }
+
+
+def rebuild(contractor_ids=None):
+    """
+    Recomputes the ranking rows of the given contractors (all if None) from their
+    OPEN, geocoded services and profile rating counters. Returns the number of rows written.
+    """
+    CraftsmanRanking = apps.get_model('jobs', 'CraftsmanRanking')
+    Job = apps.get_model('jobs', 'Job')
+    Profile = apps.get_model('users', 'Profile')
+
+    with transaction.atomic():
+        if contractor_ids is None:
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {CraftsmanRanking._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+        else:
+            advisory_xact_lock(LOCK_NAMESPACE, contractor_ids)
+
+        jobs = Job.objects.filter(status=OPEN, location__isnull=False)
+        if contractor_ids is not None:
+            jobs = jobs.filter(contractor_id__in=contractor_ids)
+
+        counts = {
+            (row['contractor_id'], row['trade']): row['total']
+            for row in jobs.values('contractor_id', 'trade').annotate(total=Count('id')).order_by()
+        }
+        # Newest service per contractor and trade (DISTINCT ON)
+        locations = (
+            jobs.order_by('contractor_id', 'trade', '-created_at', '-id')
+            .distinct('contractor_id', 'trade')
+            .values_list('contractor_id', 'trade', 'location')
+        )
+        ratings = {
+            user_id: (rating_sum, rating_count)
+            for user_id, rating_sum, rating_count in Profile.objects.filter(
+                user_id__in={contractor for contractor, _trade in counts}
+            ).values_list('user_id', 'rating_sum', 'rating_count')
+        }
+
+        rows = [
+            CraftsmanRanking(
+                contractor_id=contractor, trade=trade, location=location,
+                service_count=counts[contractor, trade],
+                **_rating_fields(*ratings.get(contractor, (0, 0)))
+            )
+            for contractor, trade, location in locations
+        ]
+
+        old = CraftsmanRanking.objects.all()
+        if contractor_ids is not None:
+            old = old.filter(contractor_id__in=contractor_ids)
+        keep = {(row.contractor_id, row.trade) for row in rows}
+        CraftsmanRanking.objects.filter(pk__in=[
+            pk for pk, contractor, trade in old.values_list('pk', 'contractor_id', 'trade')
+            if (contractor, trade) not in keep
+        ]).delete()
+        # Upserted in place, so a concurrent update_scores lands on the new row
+        CraftsmanRanking.objects.bulk_create(
+            rows, batch_size=2000,
+            update_conflicts=True, unique_fields=['contractor', 'trade'], update_fields=ROW_FIELDS,
+        )
+    return len(rows)
+
+
+def update_scores(contractor_id):
+    """
+    Copies the contractor's current rating counters into their ranking rows.
+    """
+    CraftsmanRanking = apps.get_model('jobs', 'CraftsmanRanking')
+    Profile = apps.get_model('users', 'Profile')
+    counters = Profile.objects.filter(user_id=contractor_id).values_list('rating_sum', 'rating_count').first()
+    if counters is not None:
+        CraftsmanRanking.objects.filter(contractor_id=contractor_id).update(**_rating_fields(*counters))
+
+
+def search(point, radius_km, trade=None):
+    """
+    Ranking rows within ``radius_km`` of ``point``, best first by score minus
+    distance penalty, annotated with ``distance`` and ``rank``.
+    """
+    CraftsmanRanking = apps.get_model('jobs', 'CraftsmanRanking')
+    queryset = CraftsmanRanking.objects.filter(location__dwithin=(point, D(km=radius_km)))
+    if trade:
+        queryset = queryset.filter(trade=trade)
+    # Geography distances are in metres
+    return queryset.annotate(
+        distance=Distance('location', point),
+        rank=ExpressionWrapper(
+            F('score') - Distance('location', point) * (DISTANCE_PENALTY / 1000), output_field=FloatField()
+        ),
+    ).order_by('-rank', 'contractor_id', 'trade')
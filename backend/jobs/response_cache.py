@@ -0,0 +1,130 @@
+"""
+Response cache for the anonymous, read-only services API.
+
+Rendered JSON responses of the list and detail endpoints are cached under a key built
+from a version number, the path and the normalized query parameters. Changing a job or
+a craftsman profile bumps the version, which orphans every cached response at once;
+the orphans simply expire. Each cached body carries a strong ETag, so a matching
+``If-None-Match`` is answered with 304 before any query or serializer runs.
+
+Jobs also change in the geocoder process, so responses are only cached in a cache
+shared by all processes (see config/caching.py).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from config import caching
+
+VERSION_KEY = 'services:response_version'
+CACHE_TTL = getattr(settings, 'SERVICES_RESPONSE_CACHE_TTL', 60 * 10)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock, so a version evicted from the cache is never reused
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidates every cached services response.
+    """
+    if not caching.is_shared():
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+def make_key(request):
+    """
+    Cache key for a request: version, path and the sorted query parameters.
+    """
+    params = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists()
+    )
+    raw = f'{request.path}?{params!r}'
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'services:response:{get_version()}:{digest}'
+
+
+def make_etag(content):
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def not_modified(etag):
+    response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+class CachedAnonymousResponseMixin:
+    """
+    Serves ``list`` and ``retrieve`` for anonymous JSON requests from the response cache.
+    """
+
+    def response_cache_applies(self, request):
+        return (
+            caching.is_shared()
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+            and isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if not self.response_cache_applies(request):
+            return handler(request, *args, **kwargs)
+
+        key = make_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            # Stored by finalize_response once the response is rendered
+            self._response_cache_key = key
+            return handler(request, *args, **kwargs)
+
+        content, content_type, etag = entry
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is None or not isinstance(response, Response) or response.status_code != status.HTTP_200_OK:
+            return response
+
+        response.render()
+        etag = make_etag(response.content)
+        cache.set(key, (response.content, response['Content-Type'], etag), CACHE_TTL)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response['ETag'] = etag
+        return response
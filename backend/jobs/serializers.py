@@ -5,7 +5,34 @@ from rest_framework import serializers
 from .models import Booking, Job
 
 
-class JobSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Lets clients pick the returned fields with `?fields=a,b` or drop some with `?omit=c`.
+    Only applies to the top-level serializer of a request, never to nested ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        wanted, omitted = requested_fields(request)
+        for name in list(self.fields):
+            if (wanted and name not in wanted) or name in omitted:
+                self.fields.pop(name)
+
+
+def requested_fields(request):
+    """
+    Returns the (fields, omit) sets of a request's query parameters.
+    """
+    def split(param):
+        return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+
+    return split('fields'), split('omit')
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Job model.
     Handles creation and updates including geolocation logic.
@@ -17,9 +44,10 @@ class JobSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Job
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('contractor', 'created_at', 'status',
-                            'location')  # location is read-only, set via lat/lng
+                            'location',  # location is read-only, set via lat/lng
+                            'geocoding_status', 'geocoding_attempts', 'geocoding_next_attempt_at')
 
     def create(self, validated_data):
         """
@@ -61,13 +89,40 @@ class JobSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class JobListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact read-only representation for listings: no description. The cards show
+    the city next to the title, since `address` only holds street and number.
+    """
+    contractor_username = serializers.CharField(source='contractor.username', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'title', 'trade', 'status', 'price', 'execution_date', 'address', 'city', 'location',
+                  'contractor', 'contractor_username', 'created_at']
+        read_only_fields = fields
+
+
+class JobSummarySerializer(serializers.ModelSerializer):
+    """
+    Minimal job representation nested in bookings and conversations.
+    """
+    contractor_username = serializers.CharField(source='contractor.username', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'title', 'trade', 'status', 'price', 'address', 'zip_code', 'city', 'contractor',
+                  'contractor_username']
+        read_only_fields = fields
+
+
 class BookingSerializer(serializers.ModelSerializer):
     """
     Serializer for Booking model.
     Handles validation logic for booking creation.
     """
-    # Read access: Show all job details
-    service = JobSerializer(read_only=True)
+    # Read access: Show the job summary
+    service = JobSummarySerializer(read_only=True)
 
     # Write access: Expect only job ID
     service_id = serializers.PrimaryKeyRelatedField(
@@ -109,18 +164,8 @@ class BookingSerializer(serializers.ModelSerializer):
         if scheduled_date and scheduled_date < timezone.now().date():
             raise serializers.ValidationError({"scheduled_date": "Das Datum darf nicht in der Vergangenheit liegen."})
 
-        # 3. Availability check
-        if service and scheduled_date:
-            is_busy = Booking.objects.filter(
-                contractor=service.contractor,
-                scheduled_date=scheduled_date,
-                status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED]
-            ).exists()
-
-            if is_busy:
-                raise serializers.ValidationError(
-                    {"scheduled_date": "Der Handwerker ist an diesem Datum bereits ausgebucht."}
-                )
+        # 3. Availability is enforced by the booking_contractor_day_active_uniq constraint
+        # on insert (see BookingViewSet.perform_create), which cannot race.
 
         return data
 
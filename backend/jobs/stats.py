@@ -0,0 +1,200 @@
+"""
+Contractor statistics for the dashboard, kept up to date incrementally.
+
+Saving or deleting a booking applies the difference between its old and new state
+(status, price, revenue month) to ContractorStats and ContractorMonthlyRevenue with
+F() updates, so reading the dashboard costs the same whatever the history. Contractors
+without a stats row yet, and changes whose old state is unknown, are recomputed from
+scratch with grouped aggregates instead (``rebuild``).
+
+Rebuilds of the same contractor are serialized with an advisory lock and write their
+rows in place (upsert), so incremental updates waiting on a row apply on top of the
+rebuilt values instead of being lost with a deleted row.
+"""
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from config.locks import advisory_xact_lock
+
+# Previous state of a booking that was not loaded from the database
+UNKNOWN = object()
+
+STATUS_FIELDS = {
+    'PENDING': 'pending_count',
+    'CONFIRMED': 'confirmed_count',
+    'COMPLETED': 'completed_count',
+    'CANCELLED': 'cancelled_count',
+}
+COMPLETED = 'COMPLETED'
+COUNTER_FIELDS = list(STATUS_FIELDS.values()) + ['revenue_total', 'open_offers', 'updated_at']
+# Advisory lock namespace of the per-contractor rebuild
+LOCK_NAMESPACE = 1017
+
+
+def _stats_models():
+    return apps.get_model('jobs', 'ContractorStats'), apps.get_model('jobs', 'ContractorMonthlyRevenue')
+
+
+def apply_booking_change(old, new, contractor_id):
+    """
+    Applies a booking change. ``old`` and ``new`` are Booking.stats_state() tuples,
+    None (no booking before/after) or UNKNOWN.
+    """
+    if old is UNKNOWN or new is UNKNOWN:
+        rebuild([contractor_id])
+        return
+    if old == new:
+        return
+
+    changes = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            changes.setdefault(state[0], []).append((state, sign))
+
+    ContractorStats, ContractorMonthlyRevenue = _stats_models()
+    with transaction.atomic():
+        existing = set(
+            ContractorStats.objects.filter(contractor_id__in=changes).values_list('contractor_id', flat=True)
+        )
+        missing = [contractor for contractor in changes if contractor not in existing]
+        if missing:
+            rebuild(missing)
+
+        for contractor in existing:
+            counters, revenue = {}, {}
+            for (_contractor, status, price, month), sign in changes[contractor]:
+                field = STATUS_FIELDS[status]
+                counters[field] = counters.get(field, 0) + sign
+                if status == COMPLETED:
+                    amount, bookings = revenue.get(month, (0, 0))
+                    revenue[month] = (amount + sign * (price or 0), bookings + sign)
+
+            updates = {field: F(field) + delta for field, delta in counters.items() if delta}
+            total = sum(amount for amount, _bookings in revenue.values())
+            if total:
+                updates['revenue_total'] = F('revenue_total') + total
+            if updates:
+                ContractorStats.objects.filter(contractor_id=contractor).update(updated_at=timezone.now(), **updates)
+
+            for month, (amount, bookings) in revenue.items():
+                if not amount and not bookings:
+                    continue
+                row, _created = ContractorMonthlyRevenue.objects.get_or_create(contractor_id=contractor, month=month)
+                ContractorMonthlyRevenue.objects.filter(pk=row.pk).update(
+                    revenue=F('revenue') + amount, bookings=F('bookings') + bookings
+                )
+
+
+def adjust_open_offers(contractor_id, delta):
+    """
+    Counts an offer of the contractor becoming (+1) or no longer being (-1) PENDING.
+    """
+    if not delta:
+        return
+    ContractorStats, _ContractorMonthlyRevenue = _stats_models()
+    updated = ContractorStats.objects.filter(contractor_id=contractor_id).update(
+        open_offers=F('open_offers') + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        rebuild([contractor_id])
+
+
+def _aggregate(contractor_ids):
+    """
+    Computes the stats rows (by contractor id) and monthly revenue rows from the
+    bookings and offers.
+    """
+    ContractorStats, ContractorMonthlyRevenue = _stats_models()
+    Booking = apps.get_model('jobs', 'Booking')
+    Offer = apps.get_model('chat', 'Offer')
+
+    bookings = Booking.objects.all()
+    offers = Offer.objects.filter(status='PENDING')
+    if contractor_ids is not None:
+        bookings = bookings.filter(contractor_id__in=contractor_ids)
+        offers = offers.filter(creator_id__in=contractor_ids)
+
+    stats = {contractor: ContractorStats(contractor_id=contractor) for contractor in contractor_ids or []}
+
+    def row(contractor):
+        if contractor not in stats:
+            stats[contractor] = ContractorStats(contractor_id=contractor)
+        return stats[contractor]
+
+    for item in bookings.values('contractor_id', 'status').annotate(total=Count('id')).order_by():
+        setattr(row(item['contractor_id']), STATUS_FIELDS[item['status']], item['total'])
+
+    months = []
+    revenue_rows = (
+        bookings.filter(status=COMPLETED)
+        .annotate(month=TruncMonth(Coalesce('scheduled_date', TruncDate('created_at')), output_field=DateField()))
+        .values('contractor_id', 'month')
+        .annotate(revenue=Sum('price'), total=Count('id'))
+        .order_by()
+    )
+    for item in revenue_rows:
+        stats_row = row(item['contractor_id'])
+        stats_row.revenue_total += item['revenue'] or 0
+        months.append(ContractorMonthlyRevenue(
+            contractor_id=item['contractor_id'], month=item['month'],
+            revenue=item['revenue'] or 0, bookings=item['total'],
+        ))
+
+    for item in offers.values('creator_id').annotate(total=Count('id')).order_by():
+        row(item['creator_id']).open_offers = item['total']
+    return stats, months
+
+
+def rebuild(contractor_ids=None):
+    """
+    Recomputes the statistics of the given contractors (all if None) with grouped
+    aggregates. Returns the number of stats rows written.
+    """
+    ContractorStats, ContractorMonthlyRevenue = _stats_models()
+    with transaction.atomic():
+        if contractor_ids is None:
+            # Every stats writer waits until the full rebuild commits
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {ContractorStats._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+        else:
+            advisory_xact_lock(LOCK_NAMESPACE, contractor_ids)
+            # Incremental updates already running finish first, later ones wait for the rebuild
+            list(ContractorStats.objects.select_for_update().filter(contractor_id__in=contractor_ids)
+                 .values_list('pk', flat=True))
+
+        stats, months = _aggregate(contractor_ids)
+
+        old_stats, old_months = ContractorStats.objects.all(), ContractorMonthlyRevenue.objects.all()
+        if contractor_ids is not None:
+            old_stats = old_stats.filter(contractor_id__in=contractor_ids)
+            old_months = old_months.filter(contractor_id__in=contractor_ids)
+        old_stats.exclude(contractor_id__in=list(stats)).delete()
+        keep = {(month.contractor_id, month.month) for month in months}
+        ContractorMonthlyRevenue.objects.filter(pk__in=[
+            pk for pk, contractor, month in old_months.values_list('pk', 'contractor_id', 'month')
+            if (contractor, month) not in keep
+        ]).delete()
+        ContractorStats.objects.bulk_create(
+            stats.values(), batch_size=2000,
+            update_conflicts=True, unique_fields=['contractor'], update_fields=COUNTER_FIELDS,
+        )
+        ContractorMonthlyRevenue.objects.bulk_create(
+            months, batch_size=2000,
+            update_conflicts=True, unique_fields=['contractor', 'month'], update_fields=['revenue', 'bookings'],
+        )
+    return len(stats)
+
+
+def get_stats(contractor):
+    """
+    Returns the contractor's ContractorStats row, building it on first use.
+    """
+    ContractorStats, _ContractorMonthlyRevenue = _stats_models()
+    stats = ContractorStats.objects.filter(contractor=contractor).first()
+    if stats is None:
+        rebuild([contractor.pk])
+        stats = ContractorStats.objects.get(contractor=contractor)
+    return stats
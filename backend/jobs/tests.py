@@ -0,0 +1,269 @@
+"""Tests for the Jobs application."""
+
+import random
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from chat.models import Message
+from reviews.models import Review
+from . import benchmark
+from .gazetteer import Entry, GazetteerIndex
+from .models import Booking, Job
+
+SEQ_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+
+
+class QueryPlanTests(TestCase):
+    """
+    Query-plan regression tests for the hot API querysets.
+
+    Seeds the synthetic benchmark dataset, runs EXPLAIN on every hot queryset and
+    fails if PostgreSQL plans a sequential scan on the table the query is meant to
+    hit through an index.
+    """
+    jobs = 20000
+    bookings = 20000
+    conversations = 2000
+    messages = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        contractors = benchmark.get_contractors(200)
+        customers = benchmark.get_users('customer', 500)
+
+        benchmark.seed_jobs(cls.jobs, contractors, rng)
+        benchmark.seed_bookings(cls.bookings, customers, rng)
+
+        completed = Booking.objects.filter(
+            contractor__in=contractors, status=Booking.Status.COMPLETED
+        ).values_list('id', 'customer_id', 'contractor_id')
+        Review.objects.bulk_create([
+            Review(booking_id=booking_id, reviewer_id=customer_id, recipient_id=contractor_id,
+                   rating=rng.randint(1, 5), comment='Sehr zufrieden')
+            for booking_id, customer_id, contractor_id in completed
+        ], batch_size=5000)
+
+        conversations = benchmark.seed_conversations(cls.conversations, customers, rng, messages=cls.messages)
+
+        benchmark.analyze('jobs_job', 'jobs_booking', 'reviews_review', 'chat_conversation',
+                          'chat_conversation_participants', 'chat_message')
+        cls.contractor = contractors[0]
+        cls.customer = customers[0]
+        cls.conversation = conversations[0]
+
+    def hot_queries(self):
+        """
+        (name, queryset, table that must not be sequentially scanned)
+        """
+        today = timezone.now().date()
+        active = Booking.ACTIVE_STATUSES
+        open_jobs = Job.objects.filter(status=Job.Status.OPEN)
+
+        return [
+            ('services listing', open_jobs.order_by('-created_at', '-id')[:10], 'jobs_job'),
+            ('services by trade', open_jobs.filter(trade=Job.Trade.PAINTER).order_by('-created_at')[:10],
+             'jobs_job'),
+            ('services by price', open_jobs.filter(price__gte=1900).order_by('price')[:10], 'jobs_job'),
+            ('services by date', open_jobs.filter(
+                execution_date__range=(today, today + timedelta(days=1))
+            ).order_by('execution_date')[:10], 'jobs_job'),
+            ('my-jobs', Job.objects.filter(contractor=self.contractor).order_by('-created_at'), 'jobs_job'),
+            ('availability', Booking.objects.filter(
+                contractor=self.contractor, scheduled_date__gte=today, status__in=active
+            ).values_list('scheduled_date', flat=True), 'jobs_booking'),
+            ('calendar month', Booking.objects.filter(
+                contractor=self.contractor, scheduled_date__range=(today, today + timedelta(days=31)),
+                status__in=active
+            ).values_list('scheduled_date', flat=True).distinct(), 'jobs_booking'),
+            ('booking conflict check', Booking.objects.filter(
+                contractor=self.contractor, scheduled_date=today, status__in=active
+            ).values('pk')[:1], 'jobs_booking'),
+            ('my_orders', Booking.objects.filter(contractor=self.contractor).order_by('-created_at'),
+             'jobs_booking'),
+            ('my_bookings', Booking.objects.filter(customer=self.customer).order_by('-created_at'), 'jobs_booking'),
+            ('conversation messages', Message.objects.filter(
+                conversation=self.conversation
+            ).order_by('-id')[:50], 'chat_message'),
+            ('message delta sync', Message.objects.filter(
+                conversation=self.conversation, id__gt=0
+            ).order_by('id')[:50], 'chat_message'),
+            ('received reviews', Review.objects.filter(
+                recipient=self.contractor
+            ).order_by('-created_at', '-id')[:10], 'reviews_review'),
+        ]
+
+    def test_hot_queries_use_an_index(self):
+        for name, queryset, table in self.hot_queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertNotIn(table, SEQ_SCAN_RE.findall(plan), f"Seq Scan on {table}:\n{plan}")
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """
+    Concurrent booking creates for the same contractor and day: the database
+    constraint lets exactly one through, the others get 409.
+    """
+    threads = 16
+
+    def test_only_one_booking_per_contractor_and_day(self):
+        contractor = User.objects.create_user('contractor', password='pw')
+        job = Job.objects.create(title='Wand streichen', description='Ein Zimmer', contractor=contractor)
+        customers = [User.objects.create_user(f'customer{i}', password='pw') for i in range(self.threads)]
+        day = (timezone.now().date() + timedelta(days=7)).isoformat()
+        barrier = threading.Barrier(self.threads)
+
+        def book(customer):
+            try:
+                client = APIClient()
+                client.force_authenticate(customer)
+                barrier.wait()
+                return client.post('/api/bookings/', {'service_id': job.pk, 'scheduled_date': day},
+                                   format='json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            statuses = Counter(pool.map(book, customers))
+
+        self.assertEqual(statuses, Counter({201: 1, 409: self.threads - 1}))
+        self.assertEqual(Booking.objects.filter(contractor=contractor, scheduled_date=day).count(), 1)
+
+
+class FacetCountTests(APITestCase):
+    """
+    Facet counts of the services listing (jobs/filters.py).
+    """
+
+    def setUp(self):
+        contractor = User.objects.create_user('contractor', password='pw')
+        for trade, price in [('PLUMBER', 40), ('PLUMBER', 300), ('PAINTER', 40), ('PAINTER', 80)]:
+            Job.objects.create(title='Auftrag', description='Beschreibung', contractor=contractor,
+                               trade=trade, price=price)
+
+    def facets(self, **params):
+        response = self.client.get('/api/services/', {'facets': 'true', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['facets']
+
+    def test_trade_facet_ignores_the_trade_filter(self):
+        facets = self.facets(trade='PLUMBER')
+        self.assertEqual(facets['trade']['PLUMBER'], 2)
+        self.assertEqual(facets['trade']['PAINTER'], 2)
+        self.assertEqual(facets['price']['0-50'], 1)
+        self.assertEqual(facets['price']['50-100'], 0)
+
+    def test_price_facet_ignores_the_price_filter(self):
+        facets = self.facets(price_max=50)
+        self.assertEqual(facets['price']['0-50'], 2)
+        self.assertEqual(facets['price']['250-500'], 1)
+        self.assertEqual(facets['trade']['PLUMBER'], 1)
+        self.assertEqual(facets['trade']['PAINTER'], 1)
+
+
+class GazetteerTests(SimpleTestCase):
+    """
+    Place-name lookups of the offline gazetteer (jobs/gazetteer.py).
+    """
+
+    def setUp(self):
+        self.index = GazetteerIndex([
+            Entry('50667', 'Köln', 'Nordrhein-Westfalen', 50.94, 6.95),
+            Entry('50668', 'Köln', 'Nordrhein-Westfalen', 50.95, 6.96),
+            Entry('94551', 'Köln', 'Bayern', 48.76, 13.10),
+            Entry('01844', 'Neustadt', 'Sachsen', 51.02, 14.22),
+            Entry('67433', 'Neustadt', 'Rheinland-Pfalz', 49.35, 8.14),
+        ])
+
+    def test_homonym_resolves_to_the_biggest_place(self):
+        point = self.index.resolve('koeln')
+        self.assertAlmostEqual(point.y, 50.945)
+        self.assertAlmostEqual(point.x, 6.955)
+
+    def test_ambiguous_name_is_left_to_nominatim(self):
+        self.assertIsNone(self.index.resolve('Neustadt'))
+        self.assertIsNotNone(self.index.resolve('01844 Neustadt'))
+
+    def test_homonyms_are_suggested_separately(self):
+        names = [suggestion['display_name'] for suggestion in self.index.suggest('Neu')]
+        self.assertEqual(names, ['01844 Neustadt, Sachsen', '67433 Neustadt, Rheinland-Pfalz'])
+
+
+class SearchKeysetTests(APITestCase):
+    """
+    Keyset pagination (`?cursor=`) of the ranked text search.
+    """
+
+    def setUp(self):
+        contractor = User.objects.create_user('contractor', password='pw')
+        # Many equal ranks, so the pages have to be split inside runs of ties
+        titles = ['Fliesen legen', 'Bad fliesen', 'Fliesen und Fliesen', 'Fliesenspiegel', 'Küche fliesen']
+        for i in range(23):
+            Job.objects.create(title=titles[i % len(titles)], description='Fliesen im Bad', contractor=contractor)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_pages_have_no_gaps_or_duplicates(self):
+        expected = self.walk('/api/services/?search=fliesen&page_size=100')
+        self.assertEqual(len(expected), 23)
+
+        ids = self.walk('/api/services/?search=fliesen&page_size=4&cursor=')
+        self.assertEqual(ids, expected)
+
+
+class GeocodingQueueTests(TestCase):
+    """
+    Queueing of jobs for the `geocode_jobs` worker (Job.save).
+    """
+
+    def setUp(self):
+        contractor = User.objects.create_user('contractor', password='pw')
+        job = Job.objects.create(title='Bad fliesen', description='Fliesen legen', contractor=contractor,
+                                 address='Nirgendwo 1', zip_code='50667', city='Köln')
+        Job.objects.filter(pk=job.pk).update(geocoding_status=Job.GeocodingStatus.FAILED, geocoding_attempts=5)
+        self.job = Job.objects.get(pk=job.pk)
+
+    def test_failed_job_stays_failed_on_unrelated_edits(self):
+        self.job.price = 120
+        self.job.status = Job.Status.PAUSED
+        self.job.save()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.geocoding_status, Job.GeocodingStatus.FAILED)
+        self.assertEqual(self.job.geocoding_attempts, 5)
+
+    def test_address_change_queues_the_job_again(self):
+        self.job.address = 'Domkloster 4'
+        self.job.save()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.geocoding_status, Job.GeocodingStatus.PENDING)
+        self.assertEqual(self.job.geocoding_attempts, 0)
+
+
+class BookingStatsStateTests(SimpleTestCase):
+    """
+    Revenue month of a booking in the incremental contractor statistics.
+    """
+
+    @override_settings(TIME_ZONE='Europe/Berlin')
+    def test_month_uses_the_local_date_like_the_rebuild(self):
+        # 23:30 UTC on 31 January is already 1 February in Berlin
+        booking = Booking(contractor_id=1, status=Booking.Status.CONFIRMED, price=100, scheduled_date=None,
+                          created_at=datetime(2026, 1, 31, 23, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(booking.stats_state()[3], date(2026, 2, 1))
@@ -0,0 +1,84 @@
+"""
+Title and trade completions for the services search box.
+
+Titles are matched with the pg_trgm word-similarity operator (GIN trigram index on
+Job.title), so small typos still complete. Results are cached per normalized prefix.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+
+from .models import Job
+
+MIN_LENGTH = 2
+MAX_LENGTH = 50
+LIMIT = 8
+CACHE_TTL = getattr(settings, 'TYPEAHEAD_CACHE_TTL', 60)
+
+# Rows fetched from the trigram index before duplicates are folded
+CANDIDATES = 50
+
+
+def normalize_prefix(query):
+    """
+    Lower-cases and collapses whitespace, so "  Fliesen  " and "fliesen" share a cache entry.
+    """
+    return re.sub(r'\s+', ' ', str(query or '')).strip().casefold()[:MAX_LENGTH]
+
+
+def cache_key(prefix):
+    return 'typeahead:' + hashlib.md5(prefix.encode('utf-8')).hexdigest()
+
+
+def trade_completions(prefix):
+    """
+    Trades whose label contains a word starting with the prefix ("hei" -> Sanitär & Heizung).
+    """
+    results = []
+    for code, label in Job.Trade.choices:
+        words = re.split(r'[\s&]+', str(label).casefold())
+        if any(word.startswith(prefix) for word in words) or str(label).casefold().startswith(prefix):
+            results.append({'type': 'trade', 'value': code, 'label': str(label)})
+    return results
+
+
+def title_completions(prefix, limit):
+    """
+    Distinct titles of OPEN services, most similar first.
+    """
+    candidates = (
+        Job.objects.filter(status=Job.Status.OPEN, title__trigram_word_similar=prefix)
+        .annotate(similarity=TrigramWordSimilarity(prefix, 'title'))
+        .order_by('-similarity', '-created_at')
+        .values_list('title', flat=True)[:CANDIDATES]
+    )
+    results, seen = [], set()
+    for title in candidates:
+        key = title.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append({'type': 'title', 'value': title, 'label': title})
+        if len(results) >= limit:
+            break
+    return results
+
+
+def complete(query, limit=LIMIT):
+    """
+    Returns up to ``limit`` completions (trades first, then titles) for a search prefix.
+    """
+    prefix = normalize_prefix(query)
+    if len(prefix) < MIN_LENGTH:
+        return []
+
+    key = cache_key(prefix)
+    results = cache.get(key)
+    if results is None:
+        results = trade_completions(prefix)[:limit]
+        results += title_completions(prefix, limit - len(results))
+        cache.set(key, results, CACHE_TTL)
+    return results
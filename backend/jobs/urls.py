@@ -1,10 +1,14 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import BookingViewSet, JobViewSet
+from .views import BookingViewSet, ContractorDashboardView, CraftsmanSearchView, JobViewSet
 
 router = DefaultRouter()
 # Renaming 'jobs' to 'services' for clarity
 router.register(r'services', JobViewSet, basename='service')
 router.register(r'bookings', BookingViewSet, basename='booking')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('dashboard/contractor/', ContractorDashboardView.as_view(), name='contractor-dashboard'),
+    path('craftsmen/', CraftsmanSearchView.as_view(), name='craftsman-search'),
+] + router.urls
@@ -1,68 +1,119 @@
+import logging
+
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
 from django.utils import timezone
 from geopy.geocoders import Nominatim
-from rest_framework import permissions, status, viewsets
+from rest_framework import permissions, status, views, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from config.ai_utils import get_ai_response
-from .models import Booking, Job
+from config.pagination import KeysetListMixin, KeysetPagination, OptInKeysetPagination
+from . import availability, clustering, gazetteer, ranking, stats, typeahead
+from .exceptions import booking_conflicts
+from .expressions import KNNDistance
+from .fast_serializers import BookingValuesSerializer, CraftsmanRankingValuesSerializer, JobListValuesSerializer
+from .filters import JobFilterSet, facet_counts
+from .geocoding import GeocodingError, geocode
+from .idempotency import idempotent
+from .models import Booking, ContractorMonthlyRevenue, Job
 from .permissions import IsOwnerOrReadOnly
-from .serializers import BookingSerializer, JobSerializer
+from .response_cache import CachedAnonymousResponseMixin
+from .serializers import BookingSerializer, JobListSerializer, JobSerializer, requested_fields
+
+logger = logging.getLogger(__name__)
 
 
-class JobPagination(PageNumberPagination):
+class JobKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for Job listings that follows the listing's own sort order:
+    by distance for radius searches, by rank for text searches, newest first otherwise.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        annotations = queryset.query.annotations
+        if 'distance' in annotations:
+            return ('distance', 'id')
+        if 'rank' in annotations:
+            return ('-rank', '-similarity', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class JobPagination(OptInKeysetPagination):
     """
     Custom pagination for Job listings.
+    Pass `?cursor=` to switch to keyset pagination (no COUNT, constant cost per page).
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    keyset_class = JobKeysetPagination
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(CachedAnonymousResponseMixin, KeysetListMixin, viewsets.ModelViewSet):
     """
     Manages Services (the permanent listings by craftsmen).
+    Anonymous list/detail responses are served from a cache with ETags.
     """
     # Base queryset with optimizations
     queryset = Job.objects.all().filter(status=Job.Status.OPEN).select_related('contractor__profile')
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     pagination_class = JobPagination
+    filterset_class = JobFilterSet
+    # Actions rendered with the compact JobListSerializer
+    list_actions = ('list', 'nearest', 'my_jobs')
+
+    def get_serializer_class(self):
+        if self.action in self.list_actions:
+            return JobListSerializer
+        return JobSerializer
+
+    def get_values_serializer(self):
+        """
+        Fast read path of the list actions: renders the JobListSerializer output
+        (honouring `?fields=`/`?omit=`) straight from `.values()` rows.
+        """
+        wanted, omitted = requested_fields(self.request)
+        return JobListValuesSerializer(fields=wanted, omit=omitted, context=self.get_serializer_context())
 
     def get_queryset(self):
         """
-        Custom queryset filtering based on search parameters, trade, and location.
+        Custom queryset filtering based on search parameters and location.
+        Trade, price, date and status filters are applied by JobFilterSet.
         """
         queryset = super().get_queryset()
 
         # --- FETCH PARAMETERS ---
         search_term = self.request.query_params.get('search')
-        trade_filter = self.request.query_params.get('trade')
         location_query = self.request.query_params.get('city')
         radius = self.request.query_params.get('radius')
         lat = self.request.query_params.get('lat')
         lng = self.request.query_params.get('lng')
 
-        # --- 1. TRADE FILTER ---
-        if trade_filter:
-            queryset = queryset.filter(trade=trade_filter)
-
-        # --- 2. TEXT SEARCH ---
+        # --- 1. TEXT SEARCH (full-text, ranked) ---
         if search_term:
-            search_query = Q(title__icontains=search_term) | Q(description__icontains=search_term)
+            text_query = SearchQuery(search_term, config='german', search_type='websearch')
+            # Full-text match, or a typo-tolerant trigram match on the title
+            search_query = Q(search_vector=text_query) | Q(title__trigram_word_similar=search_term)
             # Also search for matching trade (e.g., "Painter" in text -> Trade PAINTER)
             matching_trades = [code for code, label in Job.Trade.choices if
                                str(search_term).lower() in str(label).lower()]
             if matching_trades:
                 search_query = search_query | Q(trade__in=matching_trades)
-            queryset = queryset.filter(search_query)
+            # Cast from real to double precision: the values are keyset columns and have to
+            # compare equal to their JSON round trip through the cursor
+            queryset = queryset.filter(search_query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), text_query), FloatField()),
+                similarity=Cast(TrigramWordSimilarity(search_term, 'title'), FloatField()),
+            ).order_by('-rank', '-similarity', '-id')
 
-        # --- 3. GEO & RADIUS LOGIC ---
+        # --- 2. GEO & RADIUS LOGIC ---
 
         search_point = None
         used_radius = False  # IMPORTANT VARIABLE
@@ -74,16 +125,15 @@ class JobViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError):
                 pass
 
-        # Case B: City name + Radius (Geocoding)
+        # Case B: City name + Radius (offline gazetteer, then cached geocoding)
         elif location_query and radius:
-            try:
-                geolocator = Nominatim(user_agent="mycraft_backend_prod")
-                # We only search in Germany to avoid "Cologne, USA"
-                loc = geolocator.geocode(location_query, country_codes='de')
-                if loc:
-                    search_point = Point(loc.longitude, loc.latitude, srid=4326)
-            except Exception as e:
-                print(f"Geocoding Error: {e}")
+            search_point = gazetteer.resolve(location_query)
+            if search_point is None:
+                try:
+                    # We only search in Germany to avoid "Cologne, USA"
+                    search_point = geocode(location_query, country_codes='de')
+                except GeocodingError as e:
+                    logger.warning("Geocoding Error: %s", e)
 
         # --- APPLY FILTERS ---
 
@@ -102,7 +152,7 @@ class JobViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
 
-        # --- 4. LOCATION TEXT FILTER ---
+        # --- 3. LOCATION TEXT FILTER ---
 
         # We filter by city name ONLY IF we haven't already successfully filtered by radius.
         if location_query and not used_radius:
@@ -113,15 +163,42 @@ class JobViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        Lists OPEN services. With `?facets=true` the response also carries the
+        per-trade and per-price-bucket counts of the filtered result, each facet
+        counted without its own filter.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_values_serializer()
+        rows = serializer.values(queryset, 'created_at')
+
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serializer.many(rows))
+        response = self.get_paginated_response(serializer.many(page))
+
+        if request.query_params.get('facets', '').lower() in ('1', 'true'):
+            filterset = JobFilterSet(request.query_params, queryset=self.get_queryset(), request=request)
+            response.data['facets'] = facet_counts(filterset)
+        return response
+
     @action(detail=False, methods=['get'])
     def suggest_address(self, request):
         """
-        Suggests addresses based on a query string using Nominatim.
+        Suggests addresses based on a query string.
+        Postcodes and place names are completed from the offline gazetteer,
+        full street addresses are looked up with Nominatim.
         """
         query = request.query_params.get('q')
         if not query or len(query) < 3:
             return Response([])
 
+        if not gazetteer.is_street_address(query):
+            suggestions = gazetteer.suggest(query, limit=5)
+            if suggestions:
+                return Response(suggestions)
+
         try:
             # IMPORTANT: Always specify a unique User-Agent
             geolocator = Nominatim(user_agent="mycraft_app_backend_search")
@@ -155,31 +232,112 @@ class JobViewSet(viewsets.ModelViewSet):
             return Response(results)
 
         except Exception as e:
-            print(f"Geocoding Error: {e}")
+            logger.exception("Address suggestion failed for '%s'", query)
             return Response({'error': str(e)}, status=500)
 
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """
+        Returns the k OPEN services closest to a point, without any radius.
+        Ordered with the index-assisted KNN operator, so latency stays flat with catalogue size.
+        """
+        try:
+            point = Point(float(request.query_params['lng']), float(request.query_params['lat']), srid=4326)
+            k = min(max(int(request.query_params.get('k', 10)), 1), 100)
+        except (KeyError, ValueError, TypeError):
+            return Response(
+                {'detail': 'lat and lng are required, k must be a number.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.queryset.filter(location__isnull=False))
+        serializer = self.get_values_serializer()
+
+        rows = list(serializer.values(
+            queryset.annotate(distance=Distance('location', point))
+            .order_by(KNNDistance('location', point))
+        )[:k])
+        data = serializer.many(rows)
+        for item, row in zip(data, rows):
+            item['distance_km'] = round(row['distance'].km, 2)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Returns map clusters (count, centroid, dominant trade) of OPEN services
+        for `?bbox=west,south,east,north&zoom=`, computed and cached per map tile.
+        """
+        try:
+            west, south, east, north = [float(value) for value in request.query_params['bbox'].split(',')]
+            zoom = int(request.query_params['zoom'])
+        except (KeyError, ValueError, TypeError):
+            return Response(
+                {'detail': 'bbox (west,south,east,north) and zoom are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= zoom <= clustering.MAX_ZOOM or west > east or south > north:
+            return Response({'detail': 'Invalid bbox or zoom.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tiles = clustering.tiles_for_bbox(west, south, east, north, zoom)
+        if len(tiles) > clustering.MAX_TILES:
+            return Response(
+                {'detail': 'The bounding box is too large for this zoom level.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        clusters = clustering.get_clusters(self.queryset.filter(location__isnull=False), tiles)
+        return Response({
+            'zoom': zoom,
+            'count': sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters,
+        })
+
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        """
+        Returns title and trade completions for the search box, cached per prefix.
+        """
+        return Response(typeahead.complete(request.query_params.get('q', '')))
+
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
         """
         Returns a list of all booked days (dates) for the contractor of this job.
-        Starts from 'today'.
+        Starts from 'today'; deduplicated and sorted by the database.
         """
         job = self.get_object()
-        contractor = job.contractor
-
-        # Only future or today's appointments are relevant
         today = timezone.now().date()
+        # DRF automatically converts date objects to strings "YYYY-MM-DD"
+        return Response(availability.busy_days(job.contractor_id, start=today))
 
-        # We search for all bookings of this contractor that are NOT cancelled or completed
-        busy_dates = Booking.objects.filter(
-            contractor=contractor,
-            scheduled_date__gte=today,
-            status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED]
-        ).values_list('scheduled_date', flat=True)
+    @action(detail=True, methods=['get'])
+    def calendar(self, request, pk=None):
+        """
+        Returns the contractor's busy days for `?from=&to=` (default: the next 90 days)
+        as one bitmap per month: bit (day - 1) is set on busy days.
+        """
+        job = self.get_object()
+        try:
+            start, end = availability.parse_range(
+                request.query_params.get('from'), request.query_params.get('to'), timezone.now().date()
+            )
+        except availability.CalendarError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(availability.calendar(job.contractor_id, start, end))
 
-        # We remove duplicates (set) and sort the list
-        # DRF automatically converts date objects to strings "YYYY-MM-DD"
-        return Response(sorted(list(set(busy_dates))))
+    @action(detail=True, methods=['get'], url_path='check-dates')
+    def check_dates(self, request, pk=None):
+        """
+        Checks several days at once: `?dates=2026-10-01,2026-10-02` -> {"2026-10-01": true, ...}
+        (true = the contractor is still free).
+        """
+        job = self.get_object()
+        try:
+            days = availability.parse_dates(request.query_params.get('dates', ''))
+        except availability.CalendarError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(availability.check_dates(job.contractor_id, days))
 
     @action(detail=False, methods=['get'], url_path='my-jobs')
     def my_jobs(self, request):
@@ -189,10 +347,9 @@ class JobViewSet(viewsets.ModelViewSet):
         # IMPORTANT: We use Job.objects.filter(...) instead of self.get_queryset()
         # This bypasses the filter that only shows 'OPEN' jobs.
         # This allows seeing paused or hidden jobs.
-        services = Job.objects.filter(contractor=request.user).order_by('-created_at')
-
-        serializer = self.get_serializer(services, many=True)
-        return Response(serializer.data)
+        # `?status=` etc. are applied by JobFilterSet
+        services = self.filter_queryset(Job.objects.filter(contractor=request.user).order_by('-created_at'))
+        return self.keyset_list_response(services, self.get_values_serializer())
 
     @action(detail=True, methods=['get'], url_path='price-advice')
     def price_advice(self, request, pk=None):
@@ -218,7 +375,7 @@ class JobViewSet(viewsets.ModelViewSet):
         return Response({'advice': ai_reply})
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(KeysetListMixin, viewsets.ModelViewSet):
     """
     Manages Bookings between customers and contractors.
     """
@@ -231,16 +388,41 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         return Booking.objects.filter(
             Q(customer=self.request.user) | Q(contractor=self.request.user)
-        ).select_related('service', 'customer', 'contractor')
+        ).select_related('service__contractor', 'customer', 'contractor')
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
         Sets the customer to the current user and status to CONFIRMED upon creation.
+        A single atomic insert; a day that is already taken answers 409.
         """
-        serializer.save(
-            customer=self.request.user,
-            status=Booking.Status.CONFIRMED
-        )
+        with booking_conflicts():
+            serializer.save(
+                customer=self.request.user,
+                status=Booking.Status.CONFIRMED
+            )
+
+    def perform_update(self, serializer):
+        with booking_conflicts():
+            serializer.save()
+
+    def get_values_serializer(self):
+        """
+        Fast read path of the list actions, see BookingValuesSerializer.
+        """
+        return BookingValuesSerializer(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serializer.many(rows))
+        return self.get_paginated_response(serializer.many(page))
 
     @action(detail=False, methods=['get'])
     def my_bookings(self, request):
@@ -248,8 +430,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         Returns bookings where the user is the customer.
         """
         bookings = self.get_queryset().filter(customer=request.user)
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        return self.keyset_list_response(bookings, self.get_values_serializer())
 
     @action(detail=False, methods=['get'])
     def my_orders(self, request):
@@ -257,8 +438,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         Returns bookings where the user is the contractor.
         """
         bookings = self.get_queryset().filter(contractor=request.user)
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        return self.keyset_list_response(bookings, self.get_values_serializer())
 
     @action(detail=True, methods=['post'])
     def mark_completed(self, request, pk=None):
@@ -307,3 +487,82 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.save()
 
         return Response(self.get_serializer(booking).data)
+
+
+class ContractorDashboardView(views.APIView):
+    """
+    Everything the contractor dashboard shows, in one response.
+    Counters and revenue come from the incrementally maintained ContractorStats,
+    ratings from the counters on Profile, so the cost does not grow with the
+    contractor's history.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    months = 12
+    upcoming_limit = 5
+
+    def get(self, request):
+        user = request.user
+        contractor_stats = stats.get_stats(user)
+
+        revenue = ContractorMonthlyRevenue.objects.filter(contractor=user).order_by('-month')[:self.months]
+        upcoming = BookingValuesSerializer(context={'request': request})
+        upcoming_rows = upcoming.values(
+            Booking.objects.filter(
+                contractor=user, status__in=Booking.ACTIVE_STATUSES, scheduled_date__gte=timezone.now().date()
+            ).order_by('scheduled_date', 'id')[:self.upcoming_limit]
+        )
+        profile = user.profile
+
+        return Response({
+            'bookings_by_status': {
+                status_code: getattr(contractor_stats, field) for status_code, field in stats.STATUS_FIELDS.items()
+            },
+            'revenue_total': str(contractor_stats.revenue_total),
+            'revenue_by_month': [
+                {'month': row.month.strftime('%Y-%m'), 'revenue': str(row.revenue), 'bookings': row.bookings}
+                for row in revenue
+            ],
+            'upcoming': upcoming.many(upcoming_rows),
+            'open_offers': contractor_stats.open_offers,
+            'average_rating': round(profile.average_rating, 2) if profile.rating_count else None,
+            'review_count': profile.rating_count,
+        })
+
+
+class CraftsmanSearchView(views.APIView):
+    """
+    "Best <trade> near me": craftsmen within `radius` km (default 25, at most 200) of
+    `lat`/`lng` or a `city` from the gazetteer, optionally for one `trade`, ranked by
+    their precomputed Bayesian rating score minus a distance penalty.
+    One query on the CraftsmanRanking table (see jobs/ranking.py).
+    """
+    permission_classes = [permissions.AllowAny]
+    default_radius = 25
+    max_radius = 200
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        params = request.query_params
+        trade = params.get('trade')
+        if trade and trade not in Job.Trade.values:
+            return Response({'trade': ['Unbekanntes Gewerbe.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            radius = min(float(params.get('radius', self.default_radius)), self.max_radius)
+            limit = min(max(int(params.get('limit', self.default_limit)), 1), self.max_limit)
+            if params.get('lat') and params.get('lng'):
+                point = Point(float(params['lng']), float(params['lat']), srid=4326)
+            else:
+                point = gazetteer.resolve(params['city']) if params.get('city') else None
+        except (ValueError, TypeError):
+            point = None
+        if point is None or not radius > 0:
+            return Response(
+                {'detail': 'lat and lng (or a known city) are required, radius and limit must be positive numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = CraftsmanRankingValuesSerializer(context={'request': request})
+        rows = serializer.values(ranking.search(point, radius, trade))[:limit]
+        return Response(serializer.many(rows))
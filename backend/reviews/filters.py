@@ -0,0 +1,21 @@
+"""
+Filters for the review feed.
+"""
+import django_filters
+
+from .models import Review
+
+
+class ReviewFilterSet(django_filters.FilterSet):
+    """
+    Query parameters: recipient, reviewer (user ids).
+
+    Plain id filters, so an unknown user yields an empty page instead of an extra
+    existence query and a validation error.
+    """
+    recipient = django_filters.NumberFilter(field_name='recipient_id')
+    reviewer = django_filters.NumberFilter(field_name='reviewer_id')
+
+    class Meta:
+        model = Review
+        fields = ['recipient', 'reviewer']
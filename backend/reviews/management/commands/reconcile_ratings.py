@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews import ratings
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the rating counters on Profile (rating_sum, rating_count and the
+    per-star counts) from the reviews, e.g. after bulk imports that bypass the signals.
+
+    Usage:
+        python manage.py reconcile_ratings
+        python manage.py reconcile_ratings --user 12 --user 15
+    """
+    help = "Recomputes the incrementally maintained rating counters of the profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only this user (id). Can be repeated.")
+
+    def handle(self, *args, **options):
+        count = ratings.reconcile(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Rating counters of {count} profiles corrected."))
+        if count:
+            self.stdout.write("Run rebuild_craftsman_ranking to update the craftsman search scores.")
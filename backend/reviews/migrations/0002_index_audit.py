@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:05
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so the tables stay writable
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='review',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='review_recipient_feed_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from jobs import ranking
 from jobs.models import Booking
+from . import ratings
 
 
 class Review(models.Model):
@@ -19,9 +23,58 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ('booking', 'reviewer')
+        indexes = [
+            # Keyset pagination of a recipient's feed over (-created_at, -id)
+            models.Index(fields=['recipient', '-created_at', '-id'], name='review_recipient_feed_idx'),
+        ]
 
     def __str__(self):
         """
         Returns a string representation of the review.
         """
         return f"Review for Booking {self.booking.id} by {self.reviewer.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the stored rating, so the recipient's counters can be updated by difference.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating_state = instance.rating_state()
+        return instance
+
+    def rating_state(self):
+        """
+        (recipient_id, rating) as counted on the recipient's Profile,
+        or None if one of the fields is not loaded.
+        """
+        if {'recipient_id', 'rating'} - set(self.__dict__):
+            return None
+        return self.recipient_id, int(self.rating)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_counters_on_save(sender, instance, created, **kwargs):
+    """
+    Applies the difference between the stored and the new rating to the recipient's Profile.
+    """
+    old = None if created else getattr(instance, '_loaded_rating_state', ratings.UNKNOWN)
+    new = instance.rating_state()
+    ratings.apply_review_change(old, new if new is not None else ratings.UNKNOWN, instance.recipient_id)
+    instance._loaded_rating_state = new
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_counters_on_delete(sender, instance, **kwargs):
+    ratings.apply_review_change(
+        getattr(instance, '_loaded_rating_state', ratings.UNKNOWN), None, instance.recipient_id
+    )
+
+
+@receiver([post_save, post_delete], sender=Review)
+def update_craftsman_ranking_score(sender, instance, **kwargs):
+    """
+    Copies the recipient's new rating into their craftsman ranking score.
+    Registered after the counter receivers, so it reads the updated counters.
+    """
+    ranking.update_scores(instance.recipient_id)
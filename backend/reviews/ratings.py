@@ -0,0 +1,88 @@
+"""
+Received rating counters on Profile, kept up to date incrementally.
+
+Creating, changing or deleting a review applies the difference to the recipient's
+rating_sum, rating_count and per-star counter with one F() update, inside the
+transaction that writes the review (ReviewViewSet writes reviews atomically). Average
+and histogram of a profile can then be read without touching the reviews table.
+Profile.save() never writes the counters, so saving a profile loaded earlier cannot
+undo an increment. ``reconcile`` recomputes the counters from
+the reviews, e.g. after bulk imports that bypass the signals.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+# Previous state of a review that was not loaded from the database
+UNKNOWN = object()
+
+STARS = range(1, 6)
+COUNTER_FIELDS = ['rating_sum', 'rating_count'] + [f'rating_{stars}_count' for stars in STARS]
+
+
+def _deltas(state, sign, deltas):
+    recipient_id, rating = state
+    changes = deltas.setdefault(recipient_id, {})
+    for field, delta in (('rating_sum', rating), ('rating_count', 1), (f'rating_{rating}_count', 1)):
+        changes[field] = changes.get(field, 0) + sign * delta
+
+
+def apply_review_change(old, new, recipient_id):
+    """
+    Applies a review change. ``old`` and ``new`` are Review.rating_state() tuples,
+    None (no review before/after) or UNKNOWN.
+    """
+    if old is UNKNOWN or new is UNKNOWN:
+        reconcile([recipient_id])
+        return
+    if old == new:
+        return
+
+    deltas = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            _deltas(state, sign, deltas)
+
+    Profile = apps.get_model('users', 'Profile')
+    with transaction.atomic():
+        for recipient, changes in deltas.items():
+            updates = {field: F(field) + delta for field, delta in changes.items() if delta}
+            if updates:
+                Profile.objects.filter(user_id=recipient).update(**updates)
+
+
+def reconcile(user_ids=None):
+    """
+    Recomputes the rating counters of the given users (all if None) with one grouped
+    aggregate. Returns the number of profiles whose counters were wrong.
+    """
+    Profile = apps.get_model('users', 'Profile')
+    Review = apps.get_model('reviews', 'Review')
+
+    reviews = Review.objects.all()
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        reviews = reviews.filter(recipient_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    aggregates = {
+        f'rating_{stars}_count': Count('id', filter=Q(rating=stars)) for stars in STARS
+    }
+    expected = {
+        row.pop('recipient_id'): row
+        for row in reviews.values('recipient_id').annotate(
+            rating_sum=Sum('rating'), rating_count=Count('id'), **aggregates
+        ).order_by()
+    }
+
+    with transaction.atomic():
+        changed = []
+        for profile in profiles.select_for_update().only('id', 'user_id', *COUNTER_FIELDS):
+            counters = expected.get(profile.user_id, {})
+            values = {field: counters.get(field) or 0 for field in COUNTER_FIELDS}
+            if any(getattr(profile, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(profile, field, value)
+                changed.append(profile)
+        Profile.objects.bulk_update(changed, COUNTER_FIELDS, batch_size=2000)
+    return len(changed)
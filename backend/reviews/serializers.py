@@ -6,8 +6,15 @@ from .models import Review
 class ReviewSerializer(serializers.ModelSerializer):
     """
     Serializer for the Review model.
+    Reviewer name and avatar need the queryset to select_related('reviewer__profile').
     """
+    reviewer_name = serializers.CharField(source='reviewer.username', read_only=True)
+    reviewer_avatar = serializers.ImageField(source='reviewer.profile.profile_picture', read_only=True)
+
     class Meta:
         model = Review
-        fields = ['id', 'booking', 'reviewer', 'recipient', 'rating', 'comment', 'created_at']
+        fields = [
+            'id', 'booking', 'reviewer', 'reviewer_name', 'reviewer_avatar',
+            'recipient', 'rating', 'comment', 'created_at',
+        ]
         read_only_fields = ['reviewer', 'recipient']
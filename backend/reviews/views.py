@@ -1,7 +1,14 @@
-from rest_framework import viewsets
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
+from config.pagination import OptInKeysetPagination
 from jobs.models import Booking
+from users.models import Profile
+from .filters import ReviewFilterSet
 from .models import Review
 from .permissions import IsAuthenticated
 from .serializers import ReviewSerializer
@@ -10,10 +17,37 @@ from .serializers import ReviewSerializer
 class ReviewViewSet(viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing review instances.
+
+    `?recipient=<user id>` lists a craftsman's reviews, newest first. Lists stay
+    page-number paginated; with `?cursor=` they use keyset pagination over the
+    (recipient, created_at, id) index, so every page costs the same.
     """
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('reviewer__profile')
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
+    filterset_class = ReviewFilterSet
+    keyset_ordering = ('-created_at', '-id')
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Average, count and star histogram of a recipient's reviews, read from the
+        counters on their profile instead of aggregating the reviews.
+        """
+        recipient = request.query_params.get('recipient', '')
+        if not recipient.isdigit():
+            return Response(
+                {'recipient': ['Dieser Parameter ist erforderlich.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        profile = get_object_or_404(Profile, user_id=recipient)
+        return Response({
+            'recipient': profile.user_id,
+            'average_rating': profile.average_rating,
+            'review_count': profile.rating_count,
+            'histogram': {str(stars): count for stars, count in profile.rating_histogram.items()},
+        })
 
     def perform_create(self, serializer):
         """
@@ -42,4 +76,19 @@ class ReviewViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("A review for this booking has already been submitted.")
 
         # If all checks pass, save the review with the correct users
-        serializer.save(reviewer=user, recipient=booking.contractor)
+        with transaction.atomic():
+            serializer.save(reviewer=user, recipient=booking.contractor)
+
+    def perform_update(self, serializer):
+        """
+        Saves the review and the recipient's rating counters atomically.
+        """
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """
+        Deletes the review and updates the recipient's rating counters atomically.
+        """
+        with transaction.atomic():
+            instance.delete()
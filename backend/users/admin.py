@@ -19,6 +19,11 @@ class ProfileInline(admin.StackedInline):
     model = Profile
     can_delete = False
     verbose_name_plural = 'Profile'
+    # Maintained by the Review signals
+    readonly_fields = (
+        'rating_sum', 'rating_count', 'rating_1_count', 'rating_2_count',
+        'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
 
 
 # Unregister the default User admin
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.27 on 2026-10-17 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+STARS = range(1, 6)
+
+
+def backfill_rating_counters(apps, schema_editor):
+    """
+    Fills the new counters from the existing reviews.
+    """
+    Profile = apps.get_model('users', 'Profile')
+    Review = apps.get_model('reviews', 'Review')
+    rows = (
+        Review.objects.values('recipient_id')
+        .annotate(
+            rating_sum=Sum('rating'), rating_count=Count('id'),
+            **{f'rating_{stars}_count': Count('id', filter=Q(rating=stars)) for stars in STARS}
+        )
+        .order_by()
+    )
+    for row in rows:
+        Profile.objects.filter(user_id=row.pop('recipient_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('reviews', '0002_index_audit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_counters, migrations.RunPython.noop),
+    ]
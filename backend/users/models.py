@@ -45,6 +45,20 @@ class Profile(models.Model):
     # --- New Profile Picture field ---
     profile_picture = models.ImageField(upload_to=profile_picture_path, null=True, blank=True)
 
+    # --- Received ratings, maintained by the Review signals (see reviews.ratings) ---
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    RATING_COUNTER_FIELDS = (
+        'rating_sum', 'rating_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+
     def __str__(self):
         """Return a string representation of the profile.
 
@@ -53,6 +67,40 @@ class Profile(models.Model):
         """
         return f"{self.user.username}'s Profile"
 
+    def save(self, *args, **kwargs):
+        """Save the profile without writing back the rating counters.
+
+        The counters are changed with F() updates when reviews are written. A full
+        save of a profile loaded earlier (e.g. on every User save) would otherwise
+        overwrite them with stale values. Pass ``update_fields`` to write them.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.RATING_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_rating(self):
+        """Return the average received rating.
+
+        Returns:
+            float: The average rating or None if there are no reviews.
+        """
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_histogram(self):
+        """Return the number of received reviews per star rating.
+
+        Returns:
+            dict: Mapping of the ratings 1 to 5 to their review counts.
+        """
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -4,11 +4,12 @@ This module contains serializers for user registration, profile management,
 and public user representation, including craftsman details and reviews.
 """
 
-from django.db.models import Avg
+from django.db.models import Prefetch
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
 from rest_framework import serializers
 
+from reviews.models import Review
 from .models import Profile
 
 
@@ -64,6 +65,30 @@ class ProfilePictureSerializer(serializers.ModelSerializer):
 
 # --- Public Representation Serializers ---
 
+RECENT_REVIEWS = 10
+
+
+def recent_reviews_queryset():
+    """Return received reviews, newest first, with everything PublicReviewSerializer renders.
+
+    Returns:
+        QuerySet: Reviews joined with reviewer, reviewer profile and booked service.
+    """
+    return Review.objects.select_related('reviewer__profile', 'booking__service').order_by('-created_at', '-id')
+
+
+def recent_reviews_prefetch(limit=RECENT_REVIEWS):
+    """Build the prefetch for `UserSerializer.reviews` on a user queryset.
+
+    Args:
+        limit: Number of reviews per user.
+
+    Returns:
+        Prefetch: Fills `recent_reviews` with one query for all users.
+    """
+    return Prefetch('received_reviews', queryset=recent_reviews_queryset()[:limit], to_attr='recent_reviews')
+
+
 class PublicReviewSerializer(serializers.Serializer):
     """Serializer for representing a review publicly.
 
@@ -76,7 +101,7 @@ class PublicReviewSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(read_only=True)
     reviewer_name = serializers.CharField(source='reviewer.username', read_only=True)
     reviewer_avatar = serializers.ImageField(source='reviewer.profile.profile_picture', read_only=True)
-    job_title = serializers.CharField(source='job.title', read_only=True)
+    job_title = serializers.CharField(source='booking.service.title', read_only=True)
 
 
 class UserSerializer(BaseUserSerializer):
@@ -84,12 +109,14 @@ class UserSerializer(BaseUserSerializer):
 
     Includes standard user fields plus profile-specific fields like
     craftsman status, company details, average rating, and recent reviews.
+    Rating figures come from the counters on the profile; querysets should
+    select_related('profile') and prefetch `recent_reviews_prefetch()`.
     """
     is_craftsman = serializers.BooleanField(source='profile.is_craftsman', read_only=True)
     company_name = serializers.CharField(source='profile.company_name', read_only=True)
     profile_picture = serializers.ImageField(source='profile.profile_picture', read_only=True)
-    average_rating = serializers.SerializerMethodField()
-    review_count = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(source='profile.average_rating', read_only=True)
+    review_count = serializers.IntegerField(source='profile.rating_count', read_only=True)
     bio = serializers.CharField(source='profile.bio', read_only=True)
     city = serializers.CharField(source='profile.city', read_only=True)
     reviews = serializers.SerializerMethodField()
@@ -102,28 +129,6 @@ class UserSerializer(BaseUserSerializer):
             'city', 'reviews', 'date_joined'
         )
 
-    def get_average_rating(self, obj):
-        """Calculate the average rating from received reviews.
-
-        Args:
-            obj: The user instance.
-
-        Returns:
-            float: The average rating or None.
-        """
-        return obj.received_reviews.aggregate(Avg('rating'))['rating__avg']
-
-    def get_review_count(self, obj):
-        """Count the total number of received reviews.
-
-        Args:
-            obj: The user instance.
-
-        Returns:
-            int: The count of reviews.
-        """
-        return obj.received_reviews.count()
-
     def get_reviews(self, obj):
         """Retrieve the 10 most recent reviews for the user.
 
@@ -133,7 +138,9 @@ class UserSerializer(BaseUserSerializer):
         Returns:
             list: A list of serialized review data.
         """
-        reviews = obj.received_reviews.all().order_by('-created_at')[:10]
+        reviews = getattr(obj, 'recent_reviews', None)
+        if reviews is None:
+            reviews = recent_reviews_queryset().filter(recipient=obj)[:RECENT_REVIEWS]
         return PublicReviewSerializer(reviews, many=True, context=self.context).data
 
 
@@ -1,5 +1,25 @@
 """Tests for the Users application."""
 
+from django.contrib.auth.models import User
+from django.db.models import F
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Profile
+
+
+class ProfileRatingCounterTests(TestCase):
+    """
+    The rating counters are only written by F() updates, never by Profile.save().
+    """
+
+    def test_saving_a_stale_profile_keeps_the_counters(self):
+        user = User.objects.create_user('craftsman', password='pw')
+        stale = Profile.objects.get(user=user)
+        Profile.objects.filter(user=user).update(rating_sum=F('rating_sum') + 5, rating_count=F('rating_count') + 1)
+
+        stale.bio = 'Meisterbetrieb'
+        stale.save()
+        user.save()
+
+        profile = Profile.objects.get(user=user)
+        self.assertEqual((profile.bio, profile.rating_sum, profile.rating_count), ('Meisterbetrieb', 5, 1))
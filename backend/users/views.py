@@ -18,6 +18,7 @@ from .serializers import (
     PublicUserSerializer,
     UserCreateSerializer,
     UserProfileUpdateSerializer,
+    recent_reviews_prefetch,
 )
 
 
@@ -41,6 +42,18 @@ class CustomUserViewSet(DjoserUserViewSet):
     customizes the serializer used for specific actions.
     """
 
+    def get_queryset(self):
+        """
+        Return the user queryset with everything the user serializer renders.
+
+        Profile (including the rating counters) is joined, the recent reviews
+        are fetched with one query for all users.
+
+        Returns:
+            QuerySet: The user queryset.
+        """
+        return super().get_queryset().select_related('profile').prefetch_related(recent_reviews_prefetch())
+
     def get_serializer_class(self):
         """
         Return the class to use for the serializer.
@@ -351,6 +351,20 @@ export default {
     return apiClient.get('/conversations/');
   },
 
+  /**
+   * Retrieves what changed in the inbox after a sync token.
+   * Without a token, only the current token is returned; 304 means nothing changed.
+   *
+   * @param {number} [since] - The token of the previous sync.
+   * @returns {Promise<Object>} The response containing `token`, `reset`, `conversations`, `messages` and `offers`.
+   */
+  getConversationChanges(since) {
+    return apiClient.get('/conversations/changes/', {
+      params: since === undefined ? {} : { since },
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    });
+  },
+
   /**
    * Retrieves details of a specific conversation.
    *
@@ -361,6 +375,37 @@ export default {
     return apiClient.get(`/conversations/${convoId}/`);
   },
 
+  /**
+   * Retrieves a page of messages of a conversation, in chronological order.
+   *
+   * @param {number|string} convoId - The ID of the conversation.
+   * @param {Object} [params] - `after` (newer than this message ID), `before` (older than this ID) and `limit`.
+   * @returns {Promise<Object>} The response containing `results` and `has_more`.
+   */
+  getMessages(convoId, params = {}) {
+    return apiClient.get(`/conversations/${convoId}/messages/`, { params });
+  },
+
+  /**
+   * Marks a conversation as read up to a message.
+   *
+   * @param {number|string} convoId - The ID of the conversation.
+   * @param {number} [messageId] - The last read message; the latest message if omitted.
+   * @returns {Promise<Object>} The response containing the read cursor and the unread totals.
+   */
+  markConversationRead(convoId, messageId) {
+    return apiClient.post(`/conversations/${convoId}/mark-read/`, messageId ? { message_id: messageId } : {});
+  },
+
+  /**
+   * Retrieves the number of unread messages and conversations of the current user.
+   *
+   * @returns {Promise<Object>} The response containing `unread_messages` and `unread_conversations`.
+   */
+  getUnreadSummary() {
+    return apiClient.get('/conversations/unread-summary/');
+  },
+
   /**
    * Starts a new conversation related to a service.
    *
@@ -9,11 +9,16 @@ import { useToastStore } from './toast';
 
 /**
  * Pinia store for managing chat conversations and messages.
- * Handles fetching conversations, selecting active chats, sending messages, and polling for updates.
+ * Handles fetching conversations, selecting active chats, paging through messages, sending messages,
+ * polling the inbox for changes (delta sync), and the unread counters.
  */
 export const useChatStore = defineStore('chat', () => {
   const conversations = ref([]);
   const activeConversation = ref(null);
+  const hasOlderMessages = ref(false);
+  const unreadMessages = ref(0);
+  // Sync token of the last delta sync
+  let syncToken = null;
   const loading = ref(false);
   const error = ref(null);
 
@@ -22,7 +27,7 @@ export const useChatStore = defineStore('chat', () => {
   const toastStore = useToastStore();
 
   /**
-   * Stops the message polling interval.
+   * Stops the inbox polling interval.
    */
   const stopPolling = () => {
     if (pollingInterval) clearInterval(pollingInterval);
@@ -30,20 +35,13 @@ export const useChatStore = defineStore('chat', () => {
   };
 
   /**
-   * Starts polling for new messages in the active conversation.
-   *
-   * @param {number|string} convoId - The ID of the conversation to poll.
+   * Starts polling the inbox for changes.
    */
-  const startPolling = (convoId) => {
+  const startPolling = () => {
     stopPolling();
     pollingInterval = setInterval(async () => {
       try {
-        const response = await api.getConversationDetails(convoId);
-        if (activeConversation.value?.id === convoId) {
-          if (response.data.messages.length > activeConversation.value.messages.length) {
-            activeConversation.value.messages = response.data.messages;
-          }
-        }
+        await syncChanges();
       } catch (err) {
         console.error('Polling failed:', err);
         stopPolling();
@@ -52,24 +50,124 @@ export const useChatStore = defineStore('chat', () => {
   };
 
   /**
-   * Selects a conversation and loads its details.
-   * Starts polling for new messages.
+   * Sets the unread totals from a mark-read or unread-summary response.
+   *
+   * @param {Object} data - The response data.
+   */
+  const setUnreadTotals = (data) => {
+    unreadMessages.value = data.unread_messages;
+  };
+
+  /**
+   * Fetches the unread totals of the current user (for the header badge).
+   *
+   * @returns {Promise<void>}
+   */
+  const fetchUnreadSummary = async () => {
+    const response = await api.getUnreadSummary();
+    setUnreadTotals(response.data);
+  };
+
+  /**
+   * Marks the active conversation as read up to its last loaded message.
+   *
+   * @returns {Promise<void>}
+   */
+  const markActiveConversationRead = async () => {
+    const convo = activeConversation.value;
+    if (!convo || convo.messages.length === 0) return;
+    const lastId = convo.messages[convo.messages.length - 1].id;
+    try {
+      const response = await api.markConversationRead(convo.id, lastId);
+      setUnreadTotals(response.data);
+      const listed = conversations.value.find((c) => c.id === convo.id);
+      if (listed) listed.unread_count = response.data.unread_count;
+    } catch (err) {
+      console.error('Marking as read failed:', err);
+    }
+  };
+
+  /**
+   * Applies the inbox changes since the last sync: updates the changed conversations,
+   * appends new messages and offer updates to the active conversation.
+   * Reloads everything when the server asks for a reset.
+   *
+   * @returns {Promise<void>}
+   */
+  const syncChanges = async () => {
+    if (syncToken === null) return;
+    const response = await api.getConversationChanges(syncToken);
+    if (response.status === 304) return;
+    const data = response.data;
+    if (data.reset) {
+      await fetchConversations(activeConversation.value?.id ?? null);
+      return;
+    }
+    syncToken = data.token;
+
+    for (const changed of data.conversations) {
+      const index = conversations.value.findIndex((c) => c.id === changed.id);
+      if (index === -1) conversations.value.push(changed);
+      else conversations.value[index] = changed;
+    }
+    conversations.value.sort((a, b) => new Date(b.updated_at) - new Date(a.updated_at) || b.id - a.id);
+
+    const convo = activeConversation.value;
+    if (convo) {
+      // Skip messages that were already added locally after sending
+      const known = new Set(convo.messages.map((m) => m.id));
+      const added = data.messages.filter((m) => m.conversation === convo.id && !known.has(m.id));
+      convo.messages.push(...added);
+      for (const offer of data.offers.filter((o) => o.conversation === convo.id)) {
+        const message = convo.messages.find((m) => m.offer?.id === offer.id);
+        if (message) message.offer = offer;
+      }
+      if (added.length > 0) await markActiveConversationRead();
+    }
+    if (data.conversations.length > 0) await fetchUnreadSummary();
+  };
+
+  /**
+   * Prepends the previous page of the active conversation's history.
+   *
+   * @returns {Promise<void>}
+   */
+  const loadOlderMessages = async () => {
+    const convo = activeConversation.value;
+    if (!convo || !hasOlderMessages.value || convo.messages.length === 0) return;
+    try {
+      const response = await api.getMessages(convo.id, { before: convo.messages[0].id });
+      if (activeConversation.value?.id !== convo.id) return;
+      convo.messages.unshift(...response.data.results);
+      hasOlderMessages.value = response.data.has_more;
+    } catch (err) {
+      toastStore.addToast('Fehler beim Laden älterer Nachrichten.', 'error');
+    }
+  };
+
+  /**
+   * Selects a conversation, loads its details and newest messages, and marks it as read.
    *
    * @param {number|string} convoId - The ID of the conversation to select.
    * @returns {Promise<void>}
    */
   const selectConversation = async (convoId) => {
     try {
-      const response = await api.getConversationDetails(convoId);
-      activeConversation.value = response.data;
-      startPolling(convoId);
+      // Conversation details and the newest page of messages
+      const [details, messages] = await Promise.all([
+        api.getConversationDetails(convoId),
+        api.getMessages(convoId),
+      ]);
+      activeConversation.value = { ...details.data, messages: messages.data.results };
+      hasOlderMessages.value = messages.data.has_more;
+      await markActiveConversationRead();
     } catch (err) {
       error.value = 'Fehler beim Laden der Nachrichtendetails.';
     }
   };
 
   /**
-   * Fetches all conversations for the current user.
+   * Fetches all conversations for the current user and starts the delta sync.
    * Optionally selects a specific conversation after loading.
    *
    * @param {number|string} [activeConvoId=null] - The ID of the conversation to select initially.
@@ -79,9 +177,12 @@ export const useChatStore = defineStore('chat', () => {
     loading.value = true;
     error.value = null;
     try {
+      // The token is taken before the list, so no change in between is missed
+      syncToken = (await api.getConversationChanges()).data.token;
       const response = await api.getConversations();
       const data = Array.isArray(response.data) ? response.data : (response.data.results || []);
       conversations.value = data.filter((c) => c && c.id);
+      startPolling();
 
       if (activeConvoId && conversations.value.some((c) => c.id === activeConvoId)) {
         await selectConversation(activeConvoId);
@@ -115,11 +216,15 @@ export const useChatStore = defineStore('chat', () => {
   return {
     conversations,
     activeConversation,
+    hasOlderMessages,
+    unreadMessages,
     loading,
     error,
     fetchConversations,
     selectConversation,
+    loadOlderMessages,
     sendMessage,
+    fetchUnreadSummary,
     stopPolling,
   };
 });